@@ -39,6 +39,15 @@ DEFAULT_SCOPES = [
     'https://www.googleapis.com/auth/gmail.modify'
 ]
 
+# Short scope names accepted by --scopes, mapped to full URLs
+_SCOPE_MAP = {
+    "gmail.readonly": "https://www.googleapis.com/auth/gmail.readonly",
+    "gmail.send": "https://www.googleapis.com/auth/gmail.send",
+    "gmail.modify": "https://www.googleapis.com/auth/gmail.modify",
+    "gmail.compose": "https://www.googleapis.com/auth/gmail.compose",
+    "gmail.labels": "https://www.googleapis.com/auth/gmail.labels",
+}
+
 
 def authenticate(scopes: list[str], verbose: bool = False) -> dict:
     """
@@ -176,29 +185,20 @@ For more information:
     # Parse scopes argument
     if args.scopes:
         # Convert short names to full URLs
-        scope_mapping = {
-            "gmail.readonly": "https://www.googleapis.com/auth/gmail.readonly",
-            "gmail.send": "https://www.googleapis.com/auth/gmail.send",
-            "gmail.modify": "https://www.googleapis.com/auth/gmail.modify",
-            "gmail.compose": "https://www.googleapis.com/auth/gmail.compose",
-            "gmail.labels": "https://www.googleapis.com/auth/gmail.labels",
-        }
-
-        scopes = []
-        for scope in args.scopes.split(","):
-            scope = scope.strip()
-            # Check if it's a short name or full URL
-            if scope in scope_mapping:
-                scopes.append(scope_mapping[scope])
-            elif scope.startswith("https://"):
-                scopes.append(scope)
-            else:
-                print(format_error(
-                    "InvalidScope",
-                    f"Unknown scope: {scope}",
-                    help="Use --help to see available scopes"
-                ))
-                sys.exit(1)
+        scopes = [
+            _SCOPE_MAP.get(scope, scope)
+            for scope in (x.strip() for x in args.scopes.split(","))
+        ]
+
+        # Mapped short names are full URLs too; other full URLs are passed through
+        unknown = next((s for s in scopes if not s.startswith("https://")), None)
+        if unknown is not None:
+            print(format_error(
+                "InvalidScope",
+                f"Unknown scope: {unknown}",
+                help="Use --help to see available scopes"
+            ))
+            sys.exit(1)
     else:
         scopes = DEFAULT_SCOPES
 
@@ -10,20 +10,39 @@ Educational Note:
 - Error Handling: All functions return standardized JSON for easy parsing by Claude
 """
 
+import atexit
 import base64
+import functools
+import io
 import json
+import os
+import re
 import sys
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parseaddr
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+# Google client libraries and email.mime are imported inside the functions
+# that use them, so --help and JSON output paths skip their import cost
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are not serialized across processes
+    fcntl = None
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:  # orjson is optional; stdlib json produces the same structure
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
 
 
 # Determine credential directory (relative to this script's location)
@@ -34,6 +53,62 @@ PROJECT_ROOT = SKILL_DIR.parent.parent
 CRED_DIR = PROJECT_ROOT / "credentials"
 TOKEN_FILE = CRED_DIR / "token.json"
 CREDENTIALS_FILE = CRED_DIR / "credentials.json"
+TOKEN_LOCK_FILE = CRED_DIR / "token.lock"
+LABEL_CACHE_FILE = CRED_DIR / "labels_cache.json"
+
+# Seconds a cached label name→ID map stays fresh
+LABEL_CACHE_TTL = 300
+
+# Basic address shape: local@domain.tld with no whitespace, extra "@", angle
+# brackets, or commas (which would mean a display name or an address list)
+_EMAIL_RE = re.compile(r'^[^@\s<>,]+@[^@\s<>,]+\.[^@\s<>,]+\Z')
+
+# Headers extracted by parse_message (lowercase)
+_WANTED_HEADERS = frozenset({"subject", "from", "to", "date"})
+
+# Common spellings of the wanted headers mapped to their lowercase key, so
+# parse_message only lowercases names that could still be a wanted header
+_HEADER_KEYS = {
+    variant: name
+    for name in _WANTED_HEADERS
+    for variant in (name, name.capitalize(), name.upper())
+}
+_MAX_WANTED_LEN = max(map(len, _WANTED_HEADERS))
+
+# Refresh tokens this close to expiry so they don't lapse mid-request
+TOKEN_REFRESH_MARGIN = timedelta(seconds=60)
+
+# Retries (with exponential backoff) for transient API errors such as 429/5xx,
+# passed as execute(num_retries=...)
+API_NUM_RETRIES = 5
+
+
+# Verbose lines not yet written. sys.stderr is line-buffered, so each line
+# written separately costs a syscall; pending lines go out in one write with
+# the next status line, error output, or at interpreter exit.
+_pending_log: list[str] = []
+_pending_log_lock = threading.Lock()
+
+
+def _flush_log(tail: str = "") -> None:
+    """
+    Write pending verbose lines, then tail, to sys.stderr in a single call.
+
+    sys.stderr is looked up on every call so redirect_stderr and test
+    capture see the output.
+
+    Args:
+        tail: Text to write after the pending lines (e.g., a status line)
+    """
+    with _pending_log_lock:
+        text = "".join(_pending_log) + tail
+        _pending_log.clear()
+    if text:
+        sys.stderr.write(text)
+        sys.stderr.flush()
+
+
+atexit.register(_flush_log)
 
 
 def get_gmail_service(scopes: list[str]):
@@ -43,9 +118,12 @@ def get_gmail_service(scopes: list[str]):
     OAuth2 Flow:
     1. Check if token.json exists (previously authenticated)
     2. Load credentials from token
-    3. If expired but has refresh_token, auto-refresh
+    3. If expired (or about to expire) and has refresh_token, auto-refresh
     4. If no valid credentials, raise error (user needs to run gmail_auth.py)
 
+    The credentials and service are cached per scope set, so repeated calls
+    within one process skip token parsing and service construction.
+
     Args:
         scopes: List of OAuth scopes required (e.g., ['https://www.googleapis.com/auth/gmail.modify'])
 
@@ -56,35 +134,214 @@ def get_gmail_service(scopes: list[str]):
         FileNotFoundError: If credentials are missing
         Exception: If authentication fails
     """
+    _creds, service = _build_service(tuple(sorted(scopes)))
+    return service
+
+
+def _token_expires_soon(creds: "Credentials") -> bool:
+    """Check whether credentials expire within TOKEN_REFRESH_MARGIN."""
+    if creds.expiry is None:
+        return False
+    # google-auth stores expiry as naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return creds.expiry - now < TOKEN_REFRESH_MARGIN
+
+
+def _refresh_credentials(creds: "Credentials", scopes: list[str], loaded_mtime: Optional[int]) -> "Credentials":
+    """
+    Refresh credentials, coordinating with other processes sharing token.json.
+
+    Refreshes are serialized with an exclusive lock on TOKEN_LOCK_FILE. If
+    token.json changed since it was loaded, another process already refreshed
+    it, so the new token is reused instead of hitting the token endpoint again.
+
+    Args:
+        creds: Expired (or soon-to-expire) credentials
+        scopes: OAuth scopes the credentials were loaded with
+        loaded_mtime: st_mtime_ns of token.json when creds were loaded
+
+    Returns:
+        Valid credentials
+    """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
+    with open(TOKEN_LOCK_FILE, "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        # Another process may have refreshed while we waited for the lock
+        token_mtime, token_info = _load_token_info()
+        if token_info is not None and token_mtime != loaded_mtime:
+            fresh = Credentials.from_authorized_user_info(token_info, scopes)
+            if fresh.valid and not _token_expires_soon(fresh):
+                return fresh
+
+        creds.refresh(Request())
+
+        # Save refreshed token atomically so readers never see a partial file
+        tmp_file = TOKEN_FILE.with_suffix(".json.tmp")
+        tmp_file.write_text(creds.to_json())
+        os.replace(tmp_file, TOKEN_FILE)
+
+    return creds
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_http():
+    """
+    Return the process-wide HTTP transport shared by all Gmail services.
+
+    Sharing one httplib2.Http keeps its keep-alive connection to
+    gmail.googleapis.com open across calls, so follow-up requests skip the
+    TCP and TLS handshakes.
+    """
+    from googleapiclient.http import build_http
+
+    return build_http()
+
+
+# Parsed token.json contents, keyed by the file's st_mtime_ns
+_token_cache: Optional[tuple[int, dict]] = None
+
+
+def _load_token_info() -> tuple[Optional[int], Optional[dict]]:
+    """
+    Read and parse token.json, reusing the last parse while its mtime is unchanged.
+
+    Returns:
+        Tuple of (st_mtime_ns, authorized user info dict), or (None, None)
+        if token.json does not exist
+    """
+    global _token_cache
+
+    try:
+        mtime = TOKEN_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None, None
+
+    if _token_cache is None or _token_cache[0] != mtime:
+        _token_cache = (mtime, json.loads(TOKEN_FILE.read_bytes()))
+
+    return _token_cache
+
+
+# Per-thread transports for requests executed from worker threads
+_thread_local = threading.local()
+
+
+def get_thread_http(scopes: list[str]):
+    """
+    Return an authorized HTTP transport owned by the calling thread.
+
+    httplib2.Http is not thread-safe, so requests executed concurrently from
+    worker threads must not use the shared transport of the cached service.
+    Pass the result as request.execute(http=...) instead.
+
+    Args:
+        scopes: List of OAuth scopes required
+
+    Returns:
+        Authorized httplib2-compatible transport for this thread
+    """
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.http import build_http
+
+    scopes_key = tuple(sorted(scopes))
+    transports = getattr(_thread_local, "transports", None)
+    if transports is None:
+        transports = _thread_local.transports = {}
+
+    if scopes_key not in transports:
+        creds, _service = _build_service(scopes_key)
+        transports[scopes_key] = AuthorizedHttp(creds, http=build_http())
+
+    return transports[scopes_key]
+
+
+@functools.lru_cache(maxsize=8)
+def _build_service(scopes_key: tuple[str, ...]):
+    """
+    Load credentials and build the Gmail service for a sorted scope tuple.
+
+    Args:
+        scopes_key: Sorted tuple of OAuth scopes (hashable cache key)
+
+    Returns:
+        Tuple of (credentials, Gmail API service)
+    """
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build
+
+    scopes = list(scopes_key)
     creds = None
 
-    # Load existing token if available
-    if TOKEN_FILE.exists():
-        creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), scopes)
+    # Load existing token if available (parsed once per file version)
+    token_mtime, token_info = _load_token_info()
+    if token_info is not None:
+        creds = Credentials.from_authorized_user_info(token_info, scopes)
+
+    # Refresh token if needed (skipped entirely while comfortably valid)
+    if creds and creds.refresh_token and (not creds.valid or _token_expires_soon(creds)):
+        try:
+            creds = _refresh_credentials(creds, scopes, token_mtime)
+        except Exception as e:
+            raise Exception(
+                f"Token refresh failed: {str(e)}\n"
+                f"Please re-authenticate by running: python {SCRIPT_DIR}/gmail_auth.py"
+            )
 
-    # Refresh token if needed
     if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            # Auto-refresh expired token
-            try:
-                creds.refresh(Request())
-                # Save refreshed token for future use
-                TOKEN_FILE.write_text(creds.to_json())
-            except Exception as e:
-                raise Exception(
-                    f"Token refresh failed: {str(e)}\n"
-                    f"Please re-authenticate by running: python {SCRIPT_DIR}/gmail_auth.py"
-                )
-        else:
-            # No valid credentials - user needs to authenticate
-            raise FileNotFoundError(
-                f"No valid credentials found.\n"
-                f"Please run: python {SCRIPT_DIR}/gmail_auth.py\n"
-                f"Ensure {CREDENTIALS_FILE} exists before running authentication."
-            )
+        # No valid credentials - user needs to authenticate
+        raise FileNotFoundError(
+            f"No valid credentials found.\n"
+            f"Please run: python {SCRIPT_DIR}/gmail_auth.py\n"
+            f"Ensure {CREDENTIALS_FILE} exists before running authentication."
+        )
+
+    # Build Gmail API service from the discovery document bundled with
+    # googleapiclient (no network fetch, no on-disk discovery cache)
+    http = AuthorizedHttp(creds, http=_shared_http())
+    service = build('gmail', 'v1', http=http, cache_discovery=False)
+    return creds, service
 
-    # Build and return Gmail API service
-    return build('gmail', 'v1', credentials=creds)
+
+def load_label_map() -> dict[str, str]:
+    """
+    Load the cached label name→ID map.
+
+    Returns:
+        Mapping of label name to label ID, or an empty dict if the cache is
+        missing, unreadable, or older than LABEL_CACHE_TTL seconds
+    """
+    try:
+        data = json.loads(LABEL_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+    cached_at = data.pop("_ts", 0)
+    if time.time() - cached_at > LABEL_CACHE_TTL:
+        return {}
+
+    return data
+
+
+def save_label_map(label_map: dict[str, str]):
+    """
+    Save a label name→ID map to the on-disk cache.
+
+    The cache is best-effort: write failures are ignored.
+
+    Args:
+        label_map: Mapping of label name to label ID
+    """
+    data = dict(label_map)
+    data["_ts"] = time.time()
+    try:
+        LABEL_CACHE_FILE.write_text(json.dumps(data))
+    except OSError:
+        pass
 
 
 def format_error(error_type: str, message: str, **kwargs) -> str:
@@ -99,13 +356,16 @@ def format_error(error_type: str, message: str, **kwargs) -> str:
     Returns:
         JSON string with error details
     """
+    # Emit pending log lines before the caller prints the error
+    _flush_log()
+
     error_dict = {
         "status": "error",
         "error_type": error_type,
         "message": message
     }
     error_dict.update(kwargs)
-    return json.dumps(error_dict, indent=2)
+    return _dumps(error_dict)
 
 
 def format_success(data: dict) -> str:
@@ -120,7 +380,7 @@ def format_success(data: dict) -> str:
     """
     result = {"status": "success"}
     result.update(data)
-    return json.dumps(result, indent=2)
+    return _dumps(result)
 
 
 def parse_message(raw_message: dict, format_type: str = "metadata") -> dict:
@@ -143,13 +403,23 @@ def parse_message(raw_message: dict, format_type: str = "metadata") -> dict:
         return message
 
     # Extract headers for metadata and full formats
+    # Single pass that stops once all wanted headers are found
     headers = raw_message.get("payload", {}).get("headers", [])
-    header_dict = {h["name"].lower(): h["value"] for h in headers}
-
-    message["subject"] = header_dict.get("subject", "(No subject)")
-    message["from"] = header_dict.get("from", "(Unknown sender)")
-    message["to"] = header_dict.get("to", "")
-    message["date"] = header_dict.get("date", "")
+    found = {}
+    for h in headers:
+        raw_name = h["name"]
+        name = _HEADER_KEYS.get(raw_name)
+        if name is None and len(raw_name) <= _MAX_WANTED_LEN:
+            name = raw_name.lower()
+        if name in _WANTED_HEADERS and name not in found:
+            found[name] = h["value"]
+            if len(found) == len(_WANTED_HEADERS):
+                break
+
+    message["subject"] = found.get("subject", "(No subject)")
+    message["from"] = found.get("from", "(Unknown sender)")
+    message["to"] = found.get("to", "")
+    message["date"] = found.get("date", "")
     message["snippet"] = raw_message.get("snippet", "")
 
     if format_type == "full":
@@ -166,7 +436,10 @@ def decode_body(payload: dict) -> str:
     Gmail messages can have complex MIME structures:
     - Plain text messages: body directly in payload
     - Multipart messages: body in parts array
-    - Nested parts: recursively search for text/plain
+    - Nested parts: depth-first search for the first text/plain part
+
+    The MIME tree is walked with an explicit stack (no recursion) and only
+    the matching part is decoded.
 
     Args:
         payload: Message payload from Gmail API
@@ -174,27 +447,34 @@ def decode_body(payload: dict) -> str:
     Returns:
         Decoded plain text body
     """
-    # Check if body data is directly available
-    if "body" in payload and "data" in payload["body"]:
-        return base64.urlsafe_b64decode(payload["body"]["data"]).decode("utf-8")
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        data = (part.get("body") or {}).get("data")
 
-    # Check parts for multipart messages
-    if "parts" in payload:
-        for part in payload["parts"]:
-            # Look for text/plain MIME type
-            if part.get("mimeType") == "text/plain":
-                if "data" in part.get("body", {}):
-                    return base64.urlsafe_b64decode(part["body"]["data"]).decode("utf-8")
+        # Top-level body data, or the first text/plain part found
+        if data and (part is payload or part.get("mimeType") == "text/plain"):
+            return base64.urlsafe_b64decode(data).decode("utf-8", "replace")
 
-            # Recursively check nested parts
-            if "parts" in part:
-                text = decode_body(part)
-                if text:
-                    return text
+        # Push children reversed so they are visited in document order
+        stack.extend(reversed(part.get("parts", [])))
 
     return "(Body could not be decoded)"
 
 
+def _encoded_attachment(path: str) -> str:
+    """
+    Read a file and return its MIME base64 encoding.
+
+    Args:
+        path: Absolute path of the attachment
+
+    Returns:
+        Base64-encoded file contents with MIME line breaks
+    """
+    return base64.encodebytes(Path(path).read_bytes()).decode("ascii")
+
+
 def create_message(
     to: list[str],
     subject: str,
@@ -217,6 +497,41 @@ def create_message(
     Returns:
         Base64url-encoded RFC822 message string
     """
+    # base64url output is pure ASCII, so the ASCII codec is sufficient
+    return create_message_raw(to, subject, body, cc, bcc, attachments).decode("ascii")
+
+
+def create_message_raw(
+    to: list[str],
+    subject: str,
+    body: str,
+    cc: Optional[list[str]] = None,
+    bcc: Optional[list[str]] = None,
+    attachments: Optional[list[str]] = None
+) -> bytes:
+    """
+    Build RFC822 MIME message and return it as base64url-encoded bytes.
+
+    Same as create_message, but skips decoding the (possibly multi-MB)
+    encoded payload to str for callers that hand bytes to the HTTP layer.
+
+    Args:
+        to: List of recipient email addresses
+        subject: Email subject line
+        body: Plain text email body
+        cc: Optional list of CC recipients
+        bcc: Optional list of BCC recipients
+        attachments: Optional list of file paths to attach
+
+    Returns:
+        Base64url-encoded RFC822 message bytes
+    """
+    from email.generator import BytesGenerator
+    from email.mime.base import MIMEBase
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.policy import compat32
+
     # Create multipart message
     message = MIMEMultipart()
     message["To"] = ", ".join(to)
@@ -233,77 +548,119 @@ def create_message(
     # Attach files if provided
     if attachments:
         for filepath in attachments:
-            path = Path(filepath)
-            if not path.exists():
+            # Reading doubles as the existence check, so no separate stat
+            path = os.path.abspath(filepath)
+            try:
+                payload = _encoded_attachment(path)
+            except FileNotFoundError:
                 raise FileNotFoundError(f"Attachment not found: {filepath}")
 
-            # Read file and create attachment
-            with open(path, "rb") as f:
-                part = MIMEBase("application", "octet-stream")
-                part.set_payload(f.read())
-
-            # Encode in base64
-            encoders.encode_base64(part)
+            part = MIMEBase("application", "octet-stream")
+            part.set_payload(payload)
+            part["Content-Transfer-Encoding"] = "base64"
 
             # Add header with filename
             part.add_header(
                 "Content-Disposition",
-                f"attachment; filename= {path.name}"
+                f"attachment; filename= {os.path.basename(path)}"
             )
 
             message.attach(part)
 
-    # Encode message as base64url string
-    raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
-    return raw_message
+    # Serialize into a buffer and encode its memory directly as base64url,
+    # avoiding the full-message copy made by message.as_bytes()
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, mangle_from_=False, policy=compat32).flatten(message)
+    return base64.urlsafe_b64encode(buffer.getbuffer())
+
+
+def _is_display_address(email: str) -> bool:
+    """
+    Check a "Name <local@domain.tld>" address.
+
+    Only the display name and one <addr> part may be present, so address
+    lists ("a@b.com, c@d.com") and trailing text are rejected.
+
+    Args:
+        email: Address containing "<"
+
+    Returns:
+        True if email is a single valid display-name address
+    """
+    name, addr = parseaddr(email)
+    if _EMAIL_RE.match(addr) is None:
+        return False
+
+    before, sep, after = email.partition(f"<{addr}>")
+    if not sep or after.strip():
+        return False
+    # parseaddr unquotes the name and collapses its whitespace
+    leftover = " ".join(before.split())
+    return leftover in (name, f'"{name}"')
 
 
 def validate_email(email: str) -> bool:
     """
     Basic email validation.
 
+    Accepts a bare address or one with a display name ("Name <a@b.com>").
+
     Args:
         email: Email address to validate
 
     Returns:
         True if email appears valid, False otherwise
     """
-    # Simple validation: contains @ and at least one dot after @
-    if "@" not in email:
-        return False
+    # Simple validation: one @, non-empty local part, and a dot in the domain.
+    # Bare addresses match the regex directly; only "<" forms are parsed
+    if _EMAIL_RE.match(email) is not None:
+        return True
+    return "<" in email and _is_display_address(email)
 
-    local, domain = email.rsplit("@", 1)
-    if not local or not domain:
-        return False
 
-    if "." not in domain:
-        return False
+def invalid_emails(emails: Iterable[str]) -> Iterator[str]:
+    """
+    Yield the addresses in emails that fail validation.
 
-    return True
+    Args:
+        emails: Email addresses to validate
+
+    Returns:
+        Generator of invalid email addresses, in input order
+    """
+    match = _EMAIL_RE.match
+    return (
+        email for email in emails
+        if match(email) is None and not ("<" in email and _is_display_address(email))
+    )
 
 
 def log_verbose(message: str, verbose: bool = False):
     """
     Log message to stderr if verbose mode is enabled.
 
+    Lines are buffered and written out with the next status line, error,
+    or at exit.
+
     Args:
         message: Message to log
         verbose: Whether verbose logging is enabled
     """
     if verbose:
-        print(f"[VERBOSE] {message}", file=sys.stderr)
+        with _pending_log_lock:
+            _pending_log.append(f"[VERBOSE] {message}\n")
 
 
 def status_start(message: str):
     """Print start status (→) to stderr."""
-    print(f"→ {message}", file=sys.stderr, flush=True)
+    _flush_log(f"→ {message}\n")
 
 
 def status_done(message: str):
     """Print completion status (✓) to stderr."""
-    print(f"✓ {message}", file=sys.stderr, flush=True)
+    _flush_log(f"✓ {message}\n")
 
 
 def status_async(message: str):
     """Print async/LLM operation status (⟳) to stderr."""
-    print(f"⟳ {message}", file=sys.stderr, flush=True)
+    _flush_log(f"⟳ {message}\n")
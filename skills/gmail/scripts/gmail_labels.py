@@ -32,14 +32,20 @@ Educational Note:
 
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 from googleapiclient.errors import HttpError
 
 # Import common utilities
 from gmail_common import (
+    API_NUM_RETRIES,
     get_gmail_service,
+    get_thread_http,
     format_error,
     format_success,
+    load_label_map,
+    save_label_map,
     log_verbose,
     status_start,
     status_done
@@ -49,12 +55,177 @@ from gmail_common import (
 # OAuth scopes required for label management
 SCOPES = ['https://www.googleapis.com/auth/gmail.labels']
 
+# Maximum message IDs accepted by a single batchModify call
+BATCH_MODIFY_LIMIT = 1000
 
-def list_labels(verbose: bool = False) -> dict:
+# Concurrent batchModify calls; kept low to stay under Gmail's per-user quota
+MAX_MODIFY_WORKERS = 4
+
+# batchModify statuses that can mean a cached label ID no longer exists
+STALE_LABEL_STATUS = (400, 404)
+
+
+def _modify_messages(
+    service,
+    message_ids: list[str],
+    body: dict,
+    verbose: bool = False
+) -> tuple[int, list[dict]]:
+    """
+    Apply the same label modification to many messages using batchModify.
+
+    Since every message receives the same label diff, one batchModify call
+    per BATCH_MODIFY_LIMIT IDs replaces one modify round-trip per message.
+    When there are several chunks they are sent concurrently on up to
+    MAX_MODIFY_WORKERS threads.
+
+    Args:
+        service: Authenticated Gmail API service
+        message_ids: List of message IDs to modify
+        body: Label diff (e.g., {'addLabelIds': [label_id]})
+        verbose: Whether to log detailed progress
+
+    Returns:
+        Tuple of (number of successful modifications, list of per-chunk errors)
+    """
+    chunks = [
+        message_ids[i:i + BATCH_MODIFY_LIMIT]
+        for i in range(0, len(message_ids), BATCH_MODIFY_LIMIT)
+    ]
+
+    def modify_chunk(index: int, chunk: list[str], http=None) -> Optional[dict]:
+        log_verbose(f"Sending batch {index + 1}: {len(chunk)} message(s)", verbose)
+        try:
+            # batchModify returns an empty body on success; transient
+            # 429/5xx errors are retried with exponential backoff
+            service.users().messages().batchModify(
+                userId='me',
+                body={'ids': chunk, **body}
+            ).execute(http=http, num_retries=API_NUM_RETRIES)
+            return None
+        except HttpError as error:
+            return {
+                "message_ids": chunk,
+                "status_code": error.status_code,
+                "error": str(error.reason)
+            }
+
+    if len(chunks) <= 1:
+        results = [modify_chunk(i, chunk) for i, chunk in enumerate(chunks)]
+    else:
+        # Worker threads each need their own transport (httplib2 is not thread-safe)
+        with ThreadPoolExecutor(max_workers=MAX_MODIFY_WORKERS) as pool:
+            results = list(pool.map(
+                lambda item: modify_chunk(*item, http=get_thread_http(SCOPES)),
+                enumerate(chunks)
+            ))
+
+    errors = [result for result in results if result is not None]
+    successful = len(message_ids) - sum(len(e["message_ids"]) for e in errors)
+    return successful, errors
+
+
+def _resolve_label_id(service, label_name: str, refresh: bool = False) -> tuple[Optional[str], bool]:
+    """
+    Translate a label name to its ID, using the on-disk label cache when fresh.
+
+    Args:
+        service: Authenticated Gmail API service
+        label_name: Name of existing label
+        refresh: Skip the cache and re-list labels from the API
+
+    Returns:
+        Tuple of (label ID or None if not found, whether it came from the cache)
+    """
+    if not refresh:
+        label_id = load_label_map().get(label_name)
+        if label_id:
+            return label_id, True
+
+    labels = service.users().labels().list(userId='me').execute()
+    label_map = {label['name']: label['id'] for label in labels.get('labels', [])}
+    save_label_map(label_map)
+
+    return label_map.get(label_name), False
+
+
+def _modify_with_label(
+    service,
+    label_name: str,
+    message_ids: list[str],
+    body_key: str,
+    verbose: bool = False
+) -> tuple[str, int, list[dict]]:
+    """
+    Resolve a label by name and add/remove it on the given messages.
+
+    If the label ID came from the cache and Gmail rejects it (400 or 404),
+    the cache is refreshed once and the failed chunks are retried.
+
+    Args:
+        service: Authenticated Gmail API service
+        label_name: Name of existing label
+        message_ids: List of message IDs to modify
+        body_key: 'addLabelIds' or 'removeLabelIds'
+        verbose: Whether to log detailed progress
+
+    Returns:
+        Tuple of (label ID, number of successful modifications, list of errors)
+
+    Raises:
+        Exception: If label not found
+    """
+    label_id, from_cache = _resolve_label_id(service, label_name)
+    if not label_id:
+        raise Exception(f"Label not found: {label_name}")
+
+    log_verbose(f"Found label ID: {label_id}" + (" (cached)" if from_cache else ""), verbose)
+
+    successful, errors = _modify_messages(service, message_ids, {body_key: [label_id]}, verbose)
+
+    # Gmail rejects an unknown or deleted label ID in batchModify with
+    # 400 "Invalid label" (or 404), so either may mean the cache is stale
+    stale = [e for e in errors if e["status_code"] in STALE_LABEL_STATUS]
+    if from_cache and stale:
+        log_verbose("Cached label ID rejected, refreshing label cache", verbose)
+        label_id, _ = _resolve_label_id(service, label_name, refresh=True)
+        if not label_id:
+            raise Exception(f"Label not found: {label_name}")
+
+        retry_ids = [msg_id for e in stale for msg_id in e["message_ids"]]
+        retried, retry_errors = _modify_messages(service, retry_ids, {body_key: [label_id]}, verbose)
+        successful += retried
+        errors = [e for e in errors if e["status_code"] not in STALE_LABEL_STATUS] + retry_errors
+
+    return label_id, successful, errors
+
+
+def _raise_if_all_failed(successful: int, errors: list[dict]) -> None:
+    """
+    Raise when no message was modified, so the CLI exits non-zero.
+
+    Args:
+        successful: Number of messages modified
+        errors: Per-chunk errors from _modify_messages
+
+    Raises:
+        Exception: If every chunk failed
+    """
+    if errors and not successful:
+        first = errors[0]
+        raise Exception(
+            f"Gmail API error: {first['error']}\n"
+            f"Status code: {first['status_code']}\n"
+            f"Failed chunks: {len(errors)}"
+        )
+
+
+def list_labels(partition: bool = False, verbose: bool = False) -> dict:
     """
     List all Gmail labels.
 
     Args:
+        partition: Also split labels into system_labels and user_labels
         verbose: Whether to log detailed progress
 
     Returns:
@@ -75,27 +246,15 @@ def list_labels(verbose: bool = False) -> dict:
         status_done(f"Found {len(labels)} labels")
         log_verbose(f"Found {len(labels)} labels", verbose)
 
-        # Separate system and user labels
-        system_labels = []
-        user_labels = []
-
-        for label in labels:
-            label_data = {
-                "id": label['id'],
-                "name": label['name'],
-                "type": label.get('type', 'user').lower()
+        if not partition:
+            return {
+                "total_count": len(labels),
+                "labels": labels
             }
 
-            # Add optional fields if present
-            if 'messageListVisibility' in label:
-                label_data['messageListVisibility'] = label['messageListVisibility']
-            if 'labelListVisibility' in label:
-                label_data['labelListVisibility'] = label['labelListVisibility']
-
-            if label_data['type'] == 'system':
-                system_labels.append(label_data)
-            else:
-                user_labels.append(label_data)
+        # Separate system and user labels
+        system_labels = [l for l in labels if l.get('type', 'user').lower() == 'system']
+        user_labels = [l for l in labels if l.get('type', 'user').lower() != 'system']
 
         return {
             "total_count": len(labels),
@@ -184,10 +343,11 @@ def apply_label(
         verbose: Whether to log detailed progress
 
     Returns:
-        Dictionary with operation result
+        Dictionary with operation result; status is "partial" if some
+        batchModify chunks failed
 
     Raises:
-        Exception: If label not found or API call fails
+        Exception: If label not found, API call fails, or every chunk fails
     """
     status_start(f"Applying label to {len(message_ids)} messages...")
     log_verbose(f"Applying label '{label_name}' to {len(message_ids)} message(s)", verbose)
@@ -195,41 +355,28 @@ def apply_label(
     service = get_gmail_service(SCOPES)
 
     try:
-        # First, find the label ID from name
-        labels = service.users().labels().list(userId='me').execute()
-        label_id = None
-
-        for label in labels.get('labels', []):
-            if label['name'] == label_name:
-                label_id = label['id']
-                break
-
-        if not label_id:
-            raise Exception(f"Label not found: {label_name}")
-
-        log_verbose(f"Found label ID: {label_id}", verbose)
-
-        # Apply label to each message
-        successful = 0
-        for msg_id in message_ids:
-            log_verbose(f"Applying label to message: {msg_id}", verbose)
-
-            service.users().messages().modify(
-                userId='me',
-                id=msg_id,
-                body={'addLabelIds': [label_id]}
-            ).execute()
-
-            successful += 1
+        # Apply label to all messages in batchModify chunks
+        label_id, successful, errors = _modify_with_label(
+            service,
+            label_name,
+            message_ids,
+            'addLabelIds',
+            verbose
+        )
 
-        status_done("Label applied")
+        _raise_if_all_failed(successful, errors)
+        if not errors:
+            status_done("Label applied")
         log_verbose(f"Successfully labeled {successful} message(s)", verbose)
 
         return {
+            # Overrides format_success's status so partial failures are visible
+            "status": "partial" if errors else "success",
             "action": "apply",
             "label_name": label_name,
             "label_id": label_id,
             "affected_messages": successful,
+            "failed_messages": errors,
             "message_ids": message_ids
         }
 
@@ -256,10 +403,11 @@ def remove_label(
         verbose: Whether to log detailed progress
 
     Returns:
-        Dictionary with operation result
+        Dictionary with operation result; status is "partial" if some
+        batchModify chunks failed
 
     Raises:
-        Exception: If label not found or API call fails
+        Exception: If label not found, API call fails, or every chunk fails
     """
     status_start(f"Removing label from {len(message_ids)} messages...")
     log_verbose(f"Removing label '{label_name}' from {len(message_ids)} message(s)", verbose)
@@ -267,41 +415,28 @@ def remove_label(
     service = get_gmail_service(SCOPES)
 
     try:
-        # First, find the label ID from name
-        labels = service.users().labels().list(userId='me').execute()
-        label_id = None
-
-        for label in labels.get('labels', []):
-            if label['name'] == label_name:
-                label_id = label['id']
-                break
-
-        if not label_id:
-            raise Exception(f"Label not found: {label_name}")
-
-        log_verbose(f"Found label ID: {label_id}", verbose)
-
-        # Remove label from each message
-        successful = 0
-        for msg_id in message_ids:
-            log_verbose(f"Removing label from message: {msg_id}", verbose)
-
-            service.users().messages().modify(
-                userId='me',
-                id=msg_id,
-                body={'removeLabelIds': [label_id]}
-            ).execute()
-
-            successful += 1
+        # Remove label from all messages in batchModify chunks
+        label_id, successful, errors = _modify_with_label(
+            service,
+            label_name,
+            message_ids,
+            'removeLabelIds',
+            verbose
+        )
 
-        status_done("Label removed")
+        _raise_if_all_failed(successful, errors)
+        if not errors:
+            status_done("Label removed")
         log_verbose(f"Successfully removed label from {successful} message(s)", verbose)
 
         return {
+            # Overrides format_success's status so partial failures are visible
+            "status": "partial" if errors else "success",
             "action": "remove",
             "label_name": label_name,
             "label_id": label_id,
             "affected_messages": successful,
+            "failed_messages": errors,
             "message_ids": message_ids
         }
 
@@ -314,6 +449,19 @@ def remove_label(
         )
 
 
+def _parse_message_ids(value: str) -> list[str]:
+    """
+    Parse comma-separated message IDs, dropping blanks and duplicates.
+
+    Args:
+        value: Comma-separated message IDs from the command line
+
+    Returns:
+        Unique message IDs in first-seen order
+    """
+    return list(dict.fromkeys(m for m in (x.strip() for x in value.split(",")) if m))
+
+
 def main():
     """Main entry point for labels script."""
     parser = argparse.ArgumentParser(
@@ -324,6 +472,9 @@ Examples:
   # List all labels
   python gmail_labels.py --action list
 
+  # List labels split into system and user labels
+  python gmail_labels.py --action list --partition
+
   # Create simple label
   python gmail_labels.py --action create --name "Urgent"
 
@@ -370,6 +521,12 @@ Notes:
         help="Comma-separated message IDs (required for 'apply' and 'remove' actions)"
     )
 
+    parser.add_argument(
+        "--partition",
+        action="store_true",
+        help="Split listed labels into system and user labels ('list' action)"
+    )
+
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -398,13 +555,13 @@ Notes:
     # Execute requested action
     try:
         if args.action == "list":
-            result = list_labels(verbose=args.verbose)
+            result = list_labels(partition=args.partition, verbose=args.verbose)
 
         elif args.action == "create":
             result = create_label(name=args.name, verbose=args.verbose)
 
         elif args.action == "apply":
-            message_ids = [msg_id.strip() for msg_id in args.message_ids.split(",")]
+            message_ids = _parse_message_ids(args.message_ids)
             result = apply_label(
                 label_name=args.label_name,
                 message_ids=message_ids,
@@ -412,7 +569,7 @@ Notes:
             )
 
         elif args.action == "remove":
-            message_ids = [msg_id.strip() for msg_id in args.message_ids.split(",")]
+            message_ids = _parse_message_ids(args.message_ids)
             result = remove_label(
                 label_name=args.label_name,
                 message_ids=message_ids,
@@ -420,7 +577,8 @@ Notes:
             )
 
         print(format_success(result))
-        sys.exit(0)
+        # Some batchModify chunks failed: report what succeeded, but exit non-zero
+        sys.exit(1 if result.get("status") == "partial" else 0)
 
     except FileNotFoundError as e:
         print(format_error("MissingCredentials", str(e)), file=sys.stderr)
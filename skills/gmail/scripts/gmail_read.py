@@ -25,13 +25,19 @@ Educational Note:
 """
 
 import argparse
+import functools
+import random
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from googleapiclient.errors import HttpError
 
 # Import common utilities
 from gmail_common import (
+    API_NUM_RETRIES,
     get_gmail_service,
+    get_thread_http,
     parse_message,
     format_error,
     format_success,
@@ -44,6 +50,123 @@ from gmail_common import (
 # OAuth scopes required for reading emails
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+# Gmail recommends at most 50 sub-requests per batch to avoid rate limiting
+FETCH_BATCH_SIZE = 50
+
+# Concurrent batch requests; kept low to stay under Gmail's per-user quota
+MAX_FETCH_WORKERS = 4
+
+# Batch sub-responses worth re-requesting: rate limiting and transient
+# server errors. BatchHttpRequest does not retry individual parts itself.
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Partial-response masks: only the fields parse_message reads for each format
+_LIST_FIELDS = "messages(id,threadId),nextPageToken"
+_GET_FIELDS = {
+    "minimal": "id,threadId",
+    "metadata": "id,threadId,snippet,payload/headers",
+    "full": "id,threadId,snippet,payload",
+}
+
+
+def _fetch_messages(
+    service,
+    message_ids: list[str],
+    api_format: str,
+    verbose: bool = False
+) -> dict[str, dict]:
+    """
+    Fetch many messages using batch HTTP requests.
+
+    Each chunk of up to FETCH_BATCH_SIZE get calls is sent as one multipart
+    HTTP request instead of one round-trip per message. When there are
+    several chunks they are sent concurrently on up to MAX_FETCH_WORKERS
+    threads. Parts that fail with a RETRYABLE_STATUS, or whose whole batch
+    request does, are re-batched with exponential backoff.
+
+    Args:
+        service: Authenticated Gmail API service
+        message_ids: List of message IDs to fetch
+        api_format: Gmail API format ("minimal", "metadata", or "full")
+        verbose: Whether to log detailed progress
+
+    Returns:
+        Dictionary mapping message ID to raw Gmail API message
+
+    Raises:
+        HttpError: If a message fetch fails with a non-retryable status, or
+            retryable failures persist after API_NUM_RETRIES re-batches
+    """
+    fetched = {}
+
+    def fetch_all(ids: list[str]) -> dict:
+        failures = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                failures[request_id] = exception
+            else:
+                fetched[request_id] = response
+
+        def fetch_chunk(start: int, http=None) -> None:
+            chunk = ids[start:start + FETCH_BATCH_SIZE]
+            log_verbose(f"Fetching messages {start + 1}-{start + len(chunk)}/{len(ids)}...", verbose)
+
+            batch = service.new_batch_http_request(callback=callback)
+            for msg_id in chunk:
+                batch.add(
+                    service.users().messages().get(
+                        userId='me',
+                        id=msg_id,
+                        format=api_format,
+                        fields=_GET_FIELDS[api_format]
+                    ),
+                    request_id=msg_id
+                )
+            try:
+                batch.execute(http=http)
+            except HttpError as error:
+                # A rate-limited/transient failure of the whole multipart
+                # request goes through the same re-batch path as its parts
+                if error.status_code not in RETRYABLE_STATUS:
+                    raise
+                for msg_id in chunk:
+                    if msg_id not in fetched:
+                        failures[msg_id] = error
+
+        starts = range(0, len(ids), FETCH_BATCH_SIZE)
+        if len(starts) == 1:
+            fetch_chunk(0)
+        else:
+            # Worker threads each need their own transport (httplib2 is not thread-safe)
+            with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as pool:
+                list(pool.map(
+                    lambda start: fetch_chunk(start, http=get_thread_http(SCOPES)),
+                    starts
+                ))
+        return failures
+
+    pending = message_ids
+    for attempt in range(API_NUM_RETRIES + 1):
+        failures = fetch_all(pending)
+        if not failures:
+            break
+
+        for error in failures.values():
+            if error.status_code not in RETRYABLE_STATUS:
+                raise error
+        if attempt == API_NUM_RETRIES:
+            raise next(iter(failures.values()))
+
+        # Re-batch only the rate-limited/transient parts, backing off like
+        # googleapiclient's own num_retries handling
+        pending = list(failures)
+        delay = random.random() * 2 ** (attempt + 1)
+        log_verbose(f"Retrying {len(pending)} message(s) in {delay:.1f}s", verbose)
+        time.sleep(delay)
+
+    return fetched
+
 
 def search_messages(
     query: str,
@@ -82,7 +205,8 @@ def search_messages(
         results = service.users().messages().list(
             userId='me',
             q=query,
-            maxResults=max_results
+            maxResults=max_results,
+            fields=_LIST_FIELDS
         ).execute()
 
         messages = results.get('messages', [])
@@ -98,33 +222,29 @@ def search_messages(
                 "messages": []
             }
 
-        # Fetch full message details based on format type
-        detailed_messages = []
-
-        for i, msg in enumerate(messages):
-            log_verbose(f"Fetching message {i+1}/{result_count}...", verbose)
+        # format_type is fixed for the whole search, so bind it once
+        parse = functools.partial(parse_message, format_type=format_type)
 
+        # The list response already carries id and threadId, which is all
+        # the minimal format returns, so only richer formats are fetched
+        if format_type == "minimal":
+            detailed_messages = [parse(msg) for msg in messages]
+        else:
             # Determine which format to request from API
-            # - minimal: Just IDs (already have this)
             # - metadata: Headers only (no body)
             # - full: Complete message including body
-            if format_type == "minimal":
-                api_format = "minimal"
-            elif format_type == "metadata":
-                api_format = "metadata"
-            else:  # full
-                api_format = "full"
-
-            # Fetch message details
-            full_msg = service.users().messages().get(
-                userId='me',
-                id=msg['id'],
-                format=api_format
-            ).execute()
-
-            # Parse message into standardized format
-            parsed = parse_message(full_msg, format_type)
-            detailed_messages.append(parsed)
+            api_format = "metadata" if format_type == "metadata" else "full"
+
+            # Fetch message details in batched requests
+            fetched = _fetch_messages(
+                service,
+                [msg['id'] for msg in messages],
+                api_format,
+                verbose
+            )
+
+            # Parse messages into standardized format, preserving search order
+            detailed_messages = [parse(fetched[msg['id']]) for msg in messages]
 
         log_verbose("Search completed successfully", verbose)
 
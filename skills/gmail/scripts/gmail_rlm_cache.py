@@ -5,37 +5,113 @@ This module provides a disk-based caching layer for RLM LLM queries.
 Caching reduces costs by avoiding redundant API calls for identical prompts.
 
 Features:
-- SHA256-based cache keys from prompt+context+model
+- BLAKE3-based cache keys from prompt+context+model (SHA-256 if blake3 is
+  not installed)
 - TTL-based expiration (default: 24 hours)
 - Cache stats (hits, misses, tokens saved)
-- JSON file storage in temp directory
+- Single SQLite database in temp directory
 """
 
+import contextlib
+import functools
 import hashlib
 import json
+import os
+import sqlite3
 import tempfile
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
 
+try:
+    from blake3 import blake3 as new_hasher
+except ImportError:
+    # blake3 is optional; keys are then SHA-256. hashlib.sha256 is already
+    # OpenSSL's C implementation (_hashlib.openssl_sha256), which uses SHA-NI /
+    # ARMv8 crypto instructions where the CPU supports them.
+    new_hasher = hashlib.sha256
 
-@dataclass
-class CacheEntry:
-    """Represents a cached LLM query result."""
-    result: str
-    created_at: str
-    tokens_saved: int
-    model: str
-    prompt_hash: str  # For debugging/verification
+try:
+    import orjson
+
+    def dumps_json(obj) -> bytes:
+        """Serialize obj to compact UTF-8 JSON bytes."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    loads_json = orjson.loads
+except ImportError:  # orjson is optional; stdlib json writes the same documents
+    def dumps_json(obj) -> bytes:
+        """Serialize obj to compact UTF-8 JSON bytes."""
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    loads_json = json.loads
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Write a file so that readers see either the old or the new contents.
+
+    Data goes to a uniquely named temp file in the same directory, which is
+    then renamed over path. Concurrent writers of the same path each rename
+    a complete file, so the last one wins and nothing is ever torn.
+
+    Args:
+        path: Destination file path
+        data: Bytes to write
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp.{os.urandom(4).hex()}")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+# Number of recent entries QueryCache keeps in memory in front of SQLite
+MEMORY_TIER_SIZE = 256
+
+# QueryCache database layout version (PRAGMA user_version)
+_SCHEMA_VERSION = 1
+
+
+@functools.lru_cache(maxsize=64)
+def _prompt_prefix(prompt: str):
+    """
+    Return a hasher already fed with prompt and the key separator.
+
+    The same prompt is typically hashed against many contexts (one per chunk
+    in parallel_map), so its hash state is computed once and copied per key.
+    Callers must copy() the result before updating it.
+    """
+    h = new_hasher()
+    h.update(prompt.encode())
+    h.update(b"|")
+    return h
 
 
 class QueryCache:
     """
-    Disk-based cache for LLM query results.
+    SQLite-backed cache for LLM query results.
 
-    Uses SHA256 hashing of prompt+context+model to create cache keys.
-    Entries expire after ttl_hours (default: 24).
+    Uses BLAKE3 (or SHA-256) hashing of prompt+context+model to create
+    cache keys. Entries expire after ttl_hours (default: 24).
+
+    All entries live in one database (cache.sqlite in cache_dir), so a lookup
+    is a single indexed query and expiry is a single DELETE, instead of one
+    JSON file read and parse per entry. Metadata lives in typed columns and
+    the result is stored as a raw UTF-8 BLOB, so large responses are never
+    JSON-escaped or parsed. The connection is shared across
+    threads behind a lock, so parallel llm_query workers can use one cache.
+    The most recently used MEMORY_TIER_SIZE entries are also kept in an
+    in-process LRU, so repeated keys skip the database entirely.
 
     Usage:
         cache = QueryCache()
@@ -56,7 +132,7 @@ class QueryCache:
         Initialize the cache.
 
         Args:
-            cache_dir: Directory for cache files (default: temp dir)
+            cache_dir: Directory for the cache database (default: temp dir)
             ttl_hours: Time-to-live in hours (default: 24)
         """
         if cache_dir:
@@ -70,6 +146,61 @@ class QueryCache:
         self.misses = 0
         self.tokens_saved = 0
 
+        # key -> (result, tokens, created_at), least recently used first
+        self._mem: OrderedDict[str, tuple[str, int, int]] = OrderedDict()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "cache.sqlite"),
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        # Version 0 stored results inline in entries; it is only a cache, so
+        # older databases are dropped rather than migrated
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS entries")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+        # Results are content-addressed: entries point at a blob by hash, so
+        # identical responses to different queries are stored once
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "hash BLOB PRIMARY KEY, "
+            "result BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, "
+            "created_at INTEGER NOT NULL, "
+            "tokens INTEGER NOT NULL, "
+            "model TEXT NOT NULL, "
+            "blob BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries (created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_blob ON entries (blob)"
+        )
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Run the enclosed statements as one transaction. Caller holds the lock."""
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _cutoff(self) -> int:
+        """Return the epoch time before which entries are expired."""
+        return int(time.time() - self.ttl_hours * 3600)
+
     def get_key(self, prompt: str, context: str, model: str) -> str:
         """
         Generate a cache key from prompt, context, and model.
@@ -80,14 +211,15 @@ class QueryCache:
             model: The model name
 
         Returns:
-            SHA256 hash string
+            Hex digest string
         """
-        content = f"{prompt}|{context}|{model}"
-        return hashlib.sha256(content.encode()).hexdigest()
-
-    def _get_cache_path(self, key: str) -> Path:
-        """Get the file path for a cache key."""
-        return self.cache_dir / f"{key}.json"
+        # Start from the memoized prompt state and feed the remaining parts
+        # separately to avoid building one large joined string
+        h = _prompt_prefix(prompt).copy()
+        h.update(context.encode())
+        h.update(b"|")
+        h.update(model.encode())
+        return h.hexdigest()
 
     def get(self, key: str) -> Optional[str]:
         """
@@ -99,31 +231,35 @@ class QueryCache:
         Returns:
             Cached result string, or None if not found/expired
         """
-        cache_path = self._get_cache_path(key)
-
-        if not cache_path.exists():
-            return None
-
-        try:
-            data = json.loads(cache_path.read_text())
-            entry = CacheEntry(**data)
-
-            # Check expiration
-            created = datetime.fromisoformat(entry.created_at)
-            if datetime.now() - created > timedelta(hours=self.ttl_hours):
-                # Expired - remove and return None
-                cache_path.unlink(missing_ok=True)
+        cutoff = self._cutoff()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if entry[2] > cutoff:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    self.tokens_saved += entry[1]
+                    return entry[0]
+                del self._mem[key]
+
+            row = self._conn.execute(
+                "SELECT blobs.result, entries.tokens, entries.created_at "
+                "FROM entries JOIN blobs ON blobs.hash = entries.blob "
+                "WHERE entries.key = ? AND entries.created_at > ?",
+                (key, cutoff)
+            ).fetchone()
+
+            if row is None:
                 return None
 
             # Valid cache hit
+            result = row[0].decode("utf-8")
+            tokens, created_at = row[1], row[2]
+            self._remember(key, (result, tokens, created_at))
             self.hits += 1
-            self.tokens_saved += entry.tokens_saved
-            return entry.result
+            self.tokens_saved += tokens
 
-        except (json.JSONDecodeError, TypeError, KeyError):
-            # Corrupted cache file
-            cache_path.unlink(missing_ok=True)
-            return None
+        return result
 
     def set(self, key: str, result: str, tokens: int, model: str) -> None:
         """
@@ -135,16 +271,31 @@ class QueryCache:
             tokens: Total tokens used (for stats)
             model: Model name (for verification)
         """
-        entry = CacheEntry(
-            result=result,
-            created_at=datetime.now().isoformat(),
-            tokens_saved=tokens,
-            model=model,
-            prompt_hash=key[:16]  # Store partial hash for debugging
-        )
-
-        cache_path = self._get_cache_path(key)
-        cache_path.write_text(json.dumps(asdict(entry), indent=2))
+        created_at = int(time.time())
+        data = result.encode("utf-8")
+        blob = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            with self._transaction():
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, result) VALUES (?, ?)",
+                    (blob, data)
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, created_at, tokens, model, blob) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, created_at, tokens, model, blob)
+                )
+            self._remember(key, (result, tokens, created_at))
+
+    def _remember(self, key: str, entry: tuple[str, int, int]) -> None:
+        """Add an entry to the in-memory tier, evicting the least recently used.
+
+        The caller must hold self._lock.
+        """
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        if len(self._mem) > MEMORY_TIER_SIZE:
+            self._mem.popitem(last=False)
 
     def stats(self) -> dict:
         """
@@ -170,11 +321,12 @@ class QueryCache:
         Returns:
             Number of entries cleared
         """
-        count = 0
-        for cache_file in self.cache_dir.glob("*.json"):
-            cache_file.unlink()
-            count += 1
-        return count
+        with self._lock:
+            self._mem.clear()
+            with self._transaction():
+                count = self._conn.execute("DELETE FROM entries").rowcount
+                self._conn.execute("DELETE FROM blobs")
+            return count
 
     def cleanup_expired(self) -> int:
         """
@@ -183,18 +335,21 @@ class QueryCache:
         Returns:
             Number of entries removed
         """
-        count = 0
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                data = json.loads(cache_file.read_text())
-                created = datetime.fromisoformat(data.get("created_at", ""))
-                if datetime.now() - created > timedelta(hours=self.ttl_hours):
-                    cache_file.unlink()
-                    count += 1
-            except (json.JSONDecodeError, ValueError):
-                cache_file.unlink()
-                count += 1
-        return count
+        cutoff = self._cutoff()
+        with self._lock:
+            for key in [k for k, entry in self._mem.items() if entry[2] <= cutoff]:
+                del self._mem[key]
+            with self._transaction():
+                count = self._conn.execute(
+                    "DELETE FROM entries WHERE created_at <= ?",
+                    (cutoff,)
+                ).rowcount
+                # Drop blobs no remaining entry points at
+                self._conn.execute(
+                    "DELETE FROM blobs WHERE NOT EXISTS "
+                    "(SELECT 1 FROM entries WHERE entries.blob = blobs.hash)"
+                )
+            return count
 
 
 # Global cache instance
@@ -303,7 +458,7 @@ class SecurityPatternCache:
             return None
 
         try:
-            data = json.loads(cache_path.read_text())
+            data = loads_json(cache_path.read_bytes())
             entry = SecurityCacheEntry(**data)
 
             # Check expiration
@@ -339,7 +494,7 @@ class SecurityPatternCache:
         )
 
         cache_path = self._get_cache_path(key)
-        cache_path.write_text(json.dumps(asdict(entry), indent=2))
+        atomic_write_bytes(cache_path, dumps_json(asdict(entry)))
 
     def get_mitre_mapping(self, alert_signature: str) -> Optional[list[str]]:
         """
@@ -359,7 +514,7 @@ class SecurityPatternCache:
             return None
 
         try:
-            data = json.loads(cache_path.read_text())
+            data = loads_json(cache_path.read_bytes())
             created = datetime.fromisoformat(data.get("created_at", ""))
             if datetime.now() - created > timedelta(hours=self.ttl_hours):
                 cache_path.unlink(missing_ok=True)
@@ -392,7 +547,7 @@ class SecurityPatternCache:
             "ioc_type": "mitre"
         }
 
-        cache_path.write_text(json.dumps(data, indent=2))
+        atomic_write_bytes(cache_path, dumps_json(data))
 
     def stats(self) -> dict:
         """Return cache statistics."""
@@ -408,11 +563,37 @@ class SecurityPatternCache:
     def clear(self) -> int:
         """Clear all security cache entries."""
         count = 0
-        for cache_file in self.cache_dir.glob("sec_*.json"):
-            cache_file.unlink()
+        for entry in self._scan_entries():
+            os.unlink(entry.path)
             count += 1
         return count
 
+    def cleanup_expired(self) -> int:
+        """
+        Remove expired cache entries.
+
+        Entry files are written once, so their mtime is the creation time
+        and expiry is decided from the directory scan without reading them.
+
+        Returns:
+            Number of entries removed
+        """
+        cutoff = time.time() - self.ttl_hours * 3600
+        count = 0
+        for entry in self._scan_entries():
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                count += 1
+        return count
+
+    def _scan_entries(self) -> list[os.DirEntry]:
+        """Return directory entries for all security cache files."""
+        with os.scandir(self.cache_dir) as it:
+            return [
+                entry for entry in it
+                if entry.name.startswith("sec_") and entry.name.endswith(".json")
+            ]
+
 
 @dataclass
 class ThreatObservation:
@@ -488,7 +669,7 @@ class ThreatPatternStore:
         observations = []
         if ioc_file.exists():
             try:
-                data = json.loads(ioc_file.read_text())
+                data = loads_json(ioc_file.read_bytes())
                 observations = data.get("observations", [])
             except (json.JSONDecodeError, KeyError):
                 observations = []
@@ -520,7 +701,7 @@ class ThreatPatternStore:
             "observation_count": len(observations)
         }
 
-        ioc_file.write_text(json.dumps(data, indent=2))
+        atomic_write_bytes(ioc_file, dumps_json(data))
 
     def get_ioc_history(self, ioc: str, ioc_type: str = None) -> list[dict]:
         """
@@ -544,7 +725,7 @@ class ThreatPatternStore:
             ioc_file = self._get_ioc_file(ioc, ioc_t)
             if ioc_file.exists():
                 try:
-                    data = json.loads(ioc_file.read_text())
+                    data = loads_json(ioc_file.read_bytes())
                     all_observations.extend(data.get("observations", []))
                 except (json.JSONDecodeError, KeyError):
                     continue
@@ -569,7 +750,7 @@ class ThreatPatternStore:
         patterns = []
         if pattern_file.exists():
             try:
-                patterns = json.loads(pattern_file.read_text())
+                patterns = loads_json(pattern_file.read_bytes())
             except json.JSONDecodeError:
                 patterns = []
 
@@ -585,7 +766,7 @@ class ThreatPatternStore:
             if datetime.fromisoformat(p["timestamp"]) > cutoff
         ]
 
-        pattern_file.write_text(json.dumps(patterns, indent=2))
+        atomic_write_bytes(pattern_file, dumps_json(patterns))
 
     def search_similar_patterns(
         self,
@@ -608,7 +789,7 @@ class ThreatPatternStore:
             return []
 
         try:
-            historical_patterns = json.loads(pattern_file.read_text())
+            historical_patterns = loads_json(pattern_file.read_bytes())
         except json.JSONDecodeError:
             return []
 
@@ -648,7 +829,7 @@ class ThreatPatternStore:
         total_observations = 0
         for ioc_file in ioc_files:
             try:
-                data = json.loads(ioc_file.read_text())
+                data = loads_json(ioc_file.read_bytes())
                 total_observations += data.get("observation_count", 0)
             except (json.JSONDecodeError, KeyError):
                 continue
@@ -656,7 +837,7 @@ class ThreatPatternStore:
         pattern_count = 0
         if pattern_file.exists():
             try:
-                patterns = json.loads(pattern_file.read_text())
+                patterns = loads_json(pattern_file.read_bytes())
                 pattern_count = len(patterns)
             except json.JSONDecodeError:
                 pass
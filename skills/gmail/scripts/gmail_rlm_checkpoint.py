@@ -8,17 +8,21 @@ resume from where they left off if interrupted.
 Features:
 - Automatic checkpointing during parallel_map operations
 - Resume from checkpoint with validation
-- MD5 hash validation to ensure checkpoint matches current email set
+- Hash validation to ensure checkpoint matches current email set
 - Session state preservation (token counts, call counts)
 """
 
-import hashlib
 import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from pathlib import Path
 from typing import Callable, Optional, Any
 
+from gmail_rlm_cache import atomic_write_bytes, dumps_json, loads_json, new_hasher
+
 
 @dataclass
 class RLMCheckpoint:
@@ -31,7 +35,7 @@ class RLMCheckpoint:
     session_id: str
     checkpoint_id: str
     created_at: str
-    emails_hash: str              # MD5 of email IDs for validation
+    emails_hash: str              # Hash of email IDs for validation
     processed_indices: list[int]  # Which chunks have been completed
     intermediate_results: dict    # {chunk_index: result}
     session_state: dict           # Token counts, call count, etc.
@@ -40,20 +44,43 @@ class RLMCheckpoint:
 
     def save(self, path: Path) -> None:
         """
-        Persist checkpoint to JSON file.
+        Persist checkpoint to disk.
+
+        Metadata goes to ``path`` and results to the JSONL log next to it
+        (see ``results_path``). Both files are replaced atomically.
 
         Args:
             path: File path to save checkpoint
         """
         path = Path(path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(asdict(self), indent=2))
+        lines = b"".join(
+            _result_line(int(k), v) for k, v in self.intermediate_results.items()
+        )
+        atomic_write_bytes(results_path(path), lines)
+        self.save_meta(path)
+
+    def save_meta(self, path: Path) -> None:
+        """
+        Atomically persist everything except the results log.
+
+        Indices present in the results log count as processed on load even
+        if processed_indices omits them.
+
+        Args:
+            path: File path to save checkpoint metadata
+        """
+        meta = asdict(self)
+        del meta["intermediate_results"]
+        atomic_write_bytes(Path(path), dumps_json(meta))
 
     @classmethod
     def load(cls, path: Path) -> "RLMCheckpoint":
         """
         Load checkpoint from file.
 
+        Results are rebuilt by streaming the JSONL log; a torn final line
+        left by an interrupted append is ignored.
+
         Args:
             path: File path to load checkpoint from
 
@@ -65,7 +92,24 @@ class RLMCheckpoint:
             json.JSONDecodeError: If file is corrupted
         """
         path = Path(path)
-        data = json.loads(path.read_text())
+        data = loads_json(path.read_bytes())
+
+        # Checkpoints written before the split keep results inline
+        results = data.pop("intermediate_results", None) or {}
+        log = results_path(path)
+        if log.exists():
+            with open(log, "rb") as f:
+                for line in f:
+                    try:
+                        record = loads_json(line)
+                    except json.JSONDecodeError:
+                        continue
+                    results[str(record["i"])] = record["r"]
+
+        data["intermediate_results"] = results
+        data["processed_indices"] = sorted(
+            set(data.get("processed_indices", [])) | {int(k) for k in results}
+        )
         return cls(**data)
 
     def is_valid_for(self, emails: list[dict], prompt: str = None) -> bool:
@@ -85,8 +129,7 @@ class RLMCheckpoint:
 
         # Optionally verify prompt hasn't changed
         if prompt is not None and self.prompt_hash:
-            current_prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
-            if current_prompt_hash != self.prompt_hash:
+            if _compute_prompt_hash(prompt) != self.prompt_hash:
                 return False
 
         return True
@@ -99,15 +142,31 @@ class RLMCheckpoint:
         return len(self.processed_indices) / self.total_chunks * 100
 
 
+def results_path(checkpoint_path: Path) -> Path:
+    """Return the append-only results log that accompanies a checkpoint."""
+    checkpoint_path = Path(checkpoint_path)
+    return checkpoint_path.with_name(checkpoint_path.name + ".results.jsonl")
+
+
+def _result_line(index: int, result: Any) -> bytes:
+    """Encode one completed chunk as a JSONL record."""
+    return dumps_json({"i": index, "r": result}) + b"\n"
+
+
 def _compute_emails_hash(emails: list[dict]) -> str:
-    """Compute MD5 hash of email IDs for checkpoint validation."""
-    email_ids = sorted([e.get('id', str(i)) for i, e in enumerate(emails)])
-    return hashlib.md5("|".join(email_ids).encode()).hexdigest()
+    """Compute hash of email IDs for checkpoint validation."""
+    # Feed IDs one at a time instead of hashing one large joined string
+    h = new_hasher()
+    update = h.update
+    for email_id in sorted([e.get('id', str(i)) for i, e in enumerate(emails)]):
+        update(email_id.encode())
+        update(b"|")
+    return h.hexdigest()
 
 
 def _compute_prompt_hash(prompt: str) -> str:
-    """Compute MD5 hash of prompt for checkpoint validation."""
-    return hashlib.md5(prompt.encode()).hexdigest()
+    """Compute hash of prompt for checkpoint validation."""
+    return new_hasher(prompt.encode()).hexdigest()
 
 
 def create_checkpoint(
@@ -173,10 +232,10 @@ def checkpoint_parallel_map(
         context_fn: Function to convert chunk to context string
         llm_query_fn: The llm_query function to use
         checkpoint_path: Path to save/load checkpoint (None = no checkpointing)
-        checkpoint_interval: Save checkpoint every N chunks (default: 10)
+        checkpoint_interval: Save checkpoint every N completed chunks (default: 10)
         emails: Original emails list (for checkpoint validation)
         session_state_fn: Function to get current session state dict
-        max_workers: Not used in sequential mode (kept for API compatibility)
+        max_workers: Max concurrent llm_query_fn calls (default: 5)
         on_progress: Optional callback(completed, total) for progress updates
         **kwargs: Additional arguments passed to llm_query_fn
 
@@ -198,7 +257,6 @@ def checkpoint_parallel_map(
         raise ValueError("llm_query_fn is required")
 
     results = {}
-    start_idx = 0
     checkpoint = None
     session_id = "unknown"
 
@@ -211,52 +269,85 @@ def checkpoint_parallel_map(
                 if emails and checkpoint.is_valid_for(emails, func_prompt):
                     # Valid checkpoint - resume
                     results = {int(k): v for k, v in checkpoint.intermediate_results.items()}
-                    start_idx = len(checkpoint.processed_indices)
                     session_id = checkpoint.session_id
-                    print(f"Resuming from checkpoint: {start_idx}/{len(chunks)} completed ({checkpoint.progress_pct:.1f}%)", file=__import__('sys').stderr)
+                    print(f"Resuming from checkpoint: {len(results)}/{len(chunks)} completed ({checkpoint.progress_pct:.1f}%)", file=sys.stderr)
                 else:
                     # Invalid checkpoint - start fresh
-                    print("Checkpoint invalid for current data, starting fresh", file=__import__('sys').stderr)
+                    print("Checkpoint invalid for current data, starting fresh", file=sys.stderr)
             except Exception as e:
-                print(f"Could not load checkpoint: {e}, starting fresh", file=__import__('sys').stderr)
+                print(f"Could not load checkpoint: {e}, starting fresh", file=sys.stderr)
 
     # Get session ID if not from checkpoint
     if session_id == "unknown" and session_state_fn:
         state = session_state_fn()
         session_id = state.get("session_id", "unknown")
 
-    # Process chunks sequentially (for checkpointing reliability)
-    # Note: For parallel processing with checkpointing, use parallel_map directly
-    # and handle checkpointing at a higher level
     total = len(chunks)
+    # Completed chunks may be sparse after a parallel run, so resume by index
+    pending = [i for i in range(total) if i not in results]
 
-    for i in range(start_idx, total):
-        chunk = chunks[i]
-        context = context_fn(chunk)
-
-        # Make LLM call
-        result = llm_query_fn(func_prompt, context, **kwargs)
-        results[i] = result
-
-        # Progress callback
-        if on_progress:
-            on_progress(i + 1, total)
-
-        # Save checkpoint periodically
-        if checkpoint_path and ((i + 1) % checkpoint_interval == 0 or i == total - 1):
-            processed = list(range(i + 1))
-            state = session_state_fn() if session_state_fn else {}
-
-            cp = create_checkpoint(
-                session_id=session_id,
-                emails=emails or [],
-                prompt=func_prompt,
-                total_chunks=total,
-                processed_indices=processed,
-                intermediate_results={str(k): v for k, v in results.items()},
-                session_state=state
-            )
-            cp.save(Path(checkpoint_path))
+    # Completed chunks are appended to the results log as they arrive; the
+    # log is fsynced and the metadata replaced only every checkpoint_interval
+    log = None
+    if checkpoint_path:
+        log_file = results_path(checkpoint_path)
+        # Rewrite carried-over results once so appends never follow a torn line
+        atomic_write_bytes(
+            log_file, b"".join(_result_line(k, v) for k, v in results.items())
+        )
+        log = open(log_file, "ab")
+
+        # Email and prompt hashes are computed once per run, not on every save
+        cp = create_checkpoint(
+            session_id=session_id,
+            emails=emails or [],
+            prompt=func_prompt,
+            total_chunks=total
+        )
+
+    def save_checkpoint() -> None:
+        log.flush()
+        os.fsync(log.fileno())
+        # processed_indices stays empty: load() rebuilds it from the results
+        # log, so each save writes a constant-size metadata file
+        cp.created_at = datetime.now().isoformat()
+        cp.session_state = session_state_fn() if session_state_fn else {}
+        cp.save_meta(Path(checkpoint_path))
+
+    def process(chunk: Any) -> str:
+        return llm_query_fn(func_prompt, context_fn(chunk), **kwargs)
+
+    # LLM calls run on worker threads; completions are harvested here on the
+    # calling thread, so results and checkpoint writes need no extra locking
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    since_save = 0
+    try:
+        futures = {pool.submit(process, chunks[i]): i for i in pending}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if log:
+                log.write(_result_line(i, results[i]))
+            since_save += 1
+
+            # Progress callback
+            if on_progress:
+                on_progress(len(results), total)
+
+            # Save checkpoint periodically
+            if log and (since_save >= checkpoint_interval or len(results) == total):
+                save_checkpoint()
+                since_save = 0
+    except BaseException:
+        # Drop queued chunks and keep whatever finished for the next resume
+        pool.shutdown(wait=True, cancel_futures=True)
+        if log and since_save:
+            save_checkpoint()
+        raise
+    finally:
+        pool.shutdown(wait=True)
+        if log:
+            log.close()
 
     # Return results in order
     return [results[i] for i in range(len(chunks))]
@@ -292,7 +383,7 @@ def load_checkpoint_info(checkpoint_path: str) -> Optional[dict]:
 
 def clear_checkpoint(checkpoint_path: str) -> bool:
     """
-    Remove a checkpoint file.
+    Remove a checkpoint and its results log.
 
     Args:
         checkpoint_path: Path to checkpoint file
@@ -301,6 +392,7 @@ def clear_checkpoint(checkpoint_path: str) -> bool:
         True if removed, False if not found
     """
     path = Path(checkpoint_path)
+    results_path(path).unlink(missing_ok=True)
     if path.exists():
         path.unlink()
         return True
@@ -17,9 +17,15 @@ Pre-built Workflows:
 - find_action_items(emails) - Extract action items with deadlines
 """
 
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Any, Callable, Optional, TYPE_CHECKING
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Any, Callable, Iterable, Iterator, Optional, TYPE_CHECKING
+import functools
+import heapq
+import json
 import re
 
 # Type hints for functions imported at runtime from gmail_rlm_repl
@@ -27,6 +33,35 @@ if TYPE_CHECKING:
     pass  # Forward references handled by string annotations
 
 
+def iter_chunks(emails: Iterable[dict], chunk_size: int = 20) -> Iterator[list[dict]]:
+    """
+    Lazily yield fixed-size chunks of emails.
+
+    Works on any iterable and builds one chunk at a time, so streaming
+    consumers never hold every chunk in memory at once.
+
+    Args:
+        emails: Iterable of email dictionaries
+        chunk_size: Number of emails per chunk (default: 20)
+
+    Yields:
+        Lists of up to chunk_size emails
+
+    Raises:
+        ValueError: If chunk_size is less than 1
+
+    Example:
+        for chunk in iter_chunks(emails, 20):
+            summary = llm_query('Summarize these emails', context=str(chunk))
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    it = iter(emails)
+    while chunk := list(islice(it, chunk_size)):
+        yield chunk
+
+
 def chunk_by_size(emails: list[dict], chunk_size: int = 20) -> list[list[dict]]:
     """
     Split emails into fixed-size chunks for batch processing.
@@ -45,7 +80,33 @@ def chunk_by_size(emails: list[dict], chunk_size: int = 20) -> list[list[dict]]:
         for chunk in chunk_by_size(emails, 20):
             summary = llm_query('Summarize these emails', context=str(chunk))
     """
-    return [emails[i:i + chunk_size] for i in range(0, len(emails), chunk_size)]
+    return list(iter_chunks(emails, chunk_size))
+
+
+@functools.lru_cache(maxsize=4096)
+def _extract_addr(from_field: str) -> str:
+    """
+    Return the lowercased address from a "Name <email@domain.com>" header.
+
+    Fields without a non-empty <...> part are returned whole, lowercased
+    and stripped. Uses plain string scans rather than a regex, and is
+    memoized because large inboxes repeat the same few senders.
+    """
+    start = from_field.rfind('<')
+    if start >= 0:
+        end = from_field.find('>', start + 1)
+        if end > start + 1:
+            return from_field[start + 1:end].lower()
+    return from_field.lower().strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def _sender_domain(from_field: str) -> str:
+    """Return the lowercased sender domain of a From header, or 'unknown'."""
+    email_addr = _extract_addr(from_field)
+    if '@' in email_addr:
+        return email_addr.split('@')[1]
+    return 'unknown'
 
 
 def chunk_by_sender(emails: list[dict]) -> dict[str, list[dict]]:
@@ -66,22 +127,15 @@ def chunk_by_sender(emails: list[dict]) -> dict[str, list[dict]]:
         for sender, msgs in by_sender.items():
             summary = llm_query(f'What is {sender} emailing about?', context=str(msgs))
     """
-    groups = defaultdict(list)
+    groups = {}
+    group = groups.setdefault
 
     for email in emails:
-        from_field = email.get('from', '(Unknown)')
-
         # Extract email address from "Name <email@domain.com>" format
-        match = re.search(r'<([^>]+)>', from_field)
-        if match:
-            sender = match.group(1).lower()
-        else:
-            # Just use the whole field if no angle brackets
-            sender = from_field.lower().strip()
-
-        groups[sender].append(email)
+        sender = _extract_addr(email.get('from', '(Unknown)'))
+        group(sender, []).append(email)
 
-    return dict(groups)
+    return groups
 
 
 def chunk_by_sender_domain(emails: list[dict]) -> dict[str, list[dict]]:
@@ -100,27 +154,14 @@ def chunk_by_sender_domain(emails: list[dict]) -> dict[str, list[dict]]:
         by_domain = chunk_by_sender_domain(emails)
         # Summarize all emails from each company
     """
-    groups = defaultdict(list)
+    groups = {}
+    group = groups.setdefault
 
     for email in emails:
-        from_field = email.get('from', '(Unknown)')
+        # Address and domain parsing is memoized per distinct From header
+        group(_sender_domain(email.get('from', '(Unknown)')), []).append(email)
 
-        # Extract email address
-        match = re.search(r'<([^>]+)>', from_field)
-        if match:
-            email_addr = match.group(1).lower()
-        else:
-            email_addr = from_field.lower().strip()
-
-        # Extract domain
-        if '@' in email_addr:
-            domain = email_addr.split('@')[1]
-        else:
-            domain = 'unknown'
-
-        groups[domain].append(email)
-
-    return dict(groups)
+    return groups
 
 
 def chunk_by_date(emails: list[dict], period: str = 'day') -> dict[str, list[dict]]:
@@ -141,35 +182,76 @@ def chunk_by_date(emails: list[dict], period: str = 'day') -> dict[str, list[dic
         for week, msgs in by_week.items():
             summary = llm_query(f'Summarize activity for {week}', context=str(msgs))
     """
-    groups = defaultdict(list)
+    groups = {}
+    group = groups.setdefault
 
     for email in emails:
         date_str = email.get('date', '')
 
         # Try to parse the date
         date_key = _parse_date_to_key(date_str, period)
-        groups[date_key].append(email)
+        group(date_key, []).append(email)
 
-    return dict(groups)
+    return groups
 
 
-def _parse_date_to_key(date_str: str, period: str) -> str:
-    """Parse email date string and return grouping key."""
-    # Try common date formats
-    formats = [
-        '%a, %d %b %Y %H:%M:%S %z',  # RFC 2822: "Wed, 15 Jan 2026 10:30:00 -0800"
-        '%d %b %Y %H:%M:%S %z',       # Without day: "15 Jan 2026 10:30:00 -0800"
-        '%Y-%m-%d %H:%M:%S',          # ISO-like: "2026-01-15 10:30:00"
-        '%Y-%m-%d',                   # ISO date: "2026-01-15"
-    ]
-
-    dt = None
-    for fmt in formats:
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:  # ciso8601 is optional; fromisoformat is also implemented in C
+    _parse_iso = datetime.fromisoformat
+
+# Fallback email date formats, tried in order
+_DATE_FORMATS = (
+    '%a, %d %b %Y %H:%M:%S %z',  # RFC 2822: "Wed, 15 Jan 2026 10:30:00 -0800"
+    '%d %b %Y %H:%M:%S %z',       # Without day: "15 Jan 2026 10:30:00 -0800"
+    '%Y-%m-%d %H:%M:%S',          # ISO-like: "2026-01-15 10:30:00"
+    '%Y-%m-%d',                   # ISO date: "2026-01-15"
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse an email date string, or return None if no format matches.
+
+    Memoized on the string, so chunk_by_date, sort_emails and the workflows
+    built on them parse each distinct date only once per process. The
+    email dicts themselves are left untouched.
+    """
+    date_str = date_str.strip()
+
+    # Gmail dates are RFC 2822; the email package parser handles them
+    # (including trailing "(UTC)" comments) faster than strptime
+    try:
+        dt = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError):
+        pass
+    else:
+        # "-0000" yields a naive datetime; keep it comparable with the rest
+        return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+    # ISO 8601 dates ("2026-01-15", "2026-01-15 10:30:00") via a C parser
+    try:
+        return _parse_iso(date_str)
+    except ValueError:
+        pass
+
+    for fmt in _DATE_FORMATS:
         try:
-            dt = datetime.strptime(date_str.strip(), fmt)
-            break
+            return datetime.strptime(date_str, fmt)
         except ValueError:
             continue
+    return None
+
+
+def _get_dt(email: dict) -> Optional[datetime]:
+    """Return the parsed 'date' of an email, or None if it cannot be parsed."""
+    return _parse_date(email.get('date') or '')
+
+
+def _parse_date_to_key(date_str: str, period: str) -> str:
+    """Parse email date string and return grouping key."""
+    dt = _parse_date(date_str)
 
     if dt is None:
         return 'unknown_date'
@@ -197,13 +279,14 @@ def chunk_by_thread(emails: list[dict]) -> dict[str, list[dict]]:
     Returns:
         Dictionary mapping thread ID to list of emails in that thread
     """
-    groups = defaultdict(list)
+    groups = {}
+    group = groups.setdefault
 
     for email in emails:
         thread_id = email.get('threadId', email.get('id', 'unknown'))
-        groups[thread_id].append(email)
+        group(thread_id, []).append(email)
 
-    return dict(groups)
+    return groups
 
 
 def filter_emails(
@@ -229,7 +312,7 @@ def filter_emails(
 
 def filter_by_keyword(
     emails: list[dict],
-    keyword: str,
+    keyword: str | list[str],
     fields: list[str] = None
 ) -> list[dict]:
     """
@@ -237,7 +320,8 @@ def filter_by_keyword(
 
     Args:
         emails: List of email dictionaries
-        keyword: Keyword to search for (case-insensitive)
+        keyword: Keyword to search for (case-insensitive), or a list of
+                 keywords to keep emails matching any of them
         fields: Fields to search in (default: subject, snippet, body)
 
     Returns:
@@ -245,18 +329,28 @@ def filter_by_keyword(
 
     Example:
         urgent = filter_by_keyword(emails, 'urgent')
+        billing = filter_by_keyword(emails, ['invoice', 'receipt', 'payment'])
     """
     if fields is None:
         fields = ['subject', 'snippet', 'body']
 
-    keyword_lower = keyword.lower()
+    # Several keywords compile into one alternation, so each email is
+    # scanned once rather than once per keyword
+    if isinstance(keyword, str):
+        keyword_lower = keyword.lower()
+        contains = lambda haystack: keyword_lower in haystack
+    elif not keyword:
+        return []
+    else:
+        pattern = re.compile('|'.join(re.escape(k.lower()) for k in keyword))
+        contains = lambda haystack: pattern.search(haystack) is not None
 
     def matches(email: dict) -> bool:
-        for field in fields:
-            value = email.get(field, '')
-            if keyword_lower in value.lower():
-                return True
-        return False
+        # Lowercase all fields in one call; NUL keeps matches within a field.
+        # Not memoized across calls: a cache keyed on whole bodies would pin
+        # them in memory for the life of the REPL
+        haystack = '\0'.join([email.get(field) or '' for field in fields]).lower()
+        return contains(haystack)
 
     return filter_emails(emails, matches)
 
@@ -302,28 +396,27 @@ def sort_emails(
     def get_sort_key(email: dict):
         value = email.get(by, '')
         if by == 'date':
-            # Try to parse for proper date sorting
-            try:
-                for fmt in ['%a, %d %b %Y %H:%M:%S %z', '%Y-%m-%d']:
-                    try:
-                        return datetime.strptime(value.strip(), fmt)
-                    except ValueError:
-                        continue
-            except:
-                pass
-            return value
+            # Parse for proper date sorting, falling back to the raw string
+            dt = _get_dt(email)
+            return dt if dt is not None else value
         return value.lower() if isinstance(value, str) else value
 
     return sorted(emails, key=get_sort_key, reverse=reverse)
 
 
-def get_top_senders(emails: list[dict], n: int = 10) -> list[tuple[str, int]]:
+def get_top_senders(
+    emails: list[dict],
+    n: int = 10,
+    by_sender: dict[str, list[dict]] = None
+) -> list[tuple[str, int]]:
     """
     Get the top N senders by email count.
 
     Args:
         emails: List of email dictionaries
         n: Number of top senders to return
+        by_sender: Optional chunk_by_sender(emails) result to count from
+                   instead of rescanning the emails
 
     Returns:
         List of (sender, count) tuples, sorted by count descending
@@ -332,9 +425,23 @@ def get_top_senders(emails: list[dict], n: int = 10) -> list[tuple[str, int]]:
         top = get_top_senders(emails, 5)
         # [('boss@company.com', 45), ('newsletter@service.com', 30), ...]
     """
-    by_sender = chunk_by_sender(emails)
-    counts = [(sender, len(msgs)) for sender, msgs in by_sender.items()]
-    return sorted(counts, key=lambda x: -x[1])[:n]
+    if by_sender is not None:
+        # Heap-select straight from the grouping; no counts list or full sort
+        top = heapq.nlargest(n, by_sender.items(), key=lambda x: len(x[1]))
+        return [(sender, len(msgs)) for sender, msgs in top]
+
+    # Count only; per-sender email lists are never built
+    counts = Counter(_extract_addr(email.get('from', '(Unknown)')) for email in emails)
+    return counts.most_common(n)
+
+
+# Fields and labels used by extract_email_summary, in output order
+_SUMMARY_FIELDS = (
+    ('from', 'From: '),
+    ('subject', 'Subject: '),
+    ('date', 'Date: '),
+    ('snippet', 'Preview: '),
+)
 
 
 def extract_email_summary(email: dict) -> str:
@@ -349,14 +456,10 @@ def extract_email_summary(email: dict) -> str:
     """
     parts = []
 
-    if email.get('from'):
-        parts.append(f"From: {email['from']}")
-    if email.get('subject'):
-        parts.append(f"Subject: {email['subject']}")
-    if email.get('date'):
-        parts.append(f"Date: {email['date']}")
-    if email.get('snippet'):
-        parts.append(f"Preview: {email['snippet']}")
+    for field, label in _SUMMARY_FIELDS:
+        value = email.get(field)
+        if value:
+            parts.append(f"{label}{value}")
 
     return '\n'.join(parts)
 
@@ -378,6 +481,7 @@ def batch_extract_summaries(emails: list[dict], max_chars: int = 4000) -> str:
     total_chars = 0
 
     for i, email in enumerate(emails):
+        # Each entry is formatted once; the first one over budget ends the batch
         summary = f"[{i+1}] {extract_email_summary(email)}"
         summary_len = len(summary) + 2  # +2 for newlines
 
@@ -411,6 +515,9 @@ def deduplicate_emails(emails: list[dict]) -> list[dict]:
     """
     Remove duplicate emails based on message ID.
 
+    Keeps the first occurrence of each ID and every email without an ID,
+    in their original order.
+
     Args:
         emails: List of email dictionaries
 
@@ -422,10 +529,10 @@ def deduplicate_emails(emails: list[dict]) -> list[dict]:
 
     for email in emails:
         msg_id = email.get('id')
-        if msg_id and msg_id not in seen:
-            seen.add(msg_id)
+        if not msg_id:
             result.append(email)
-        elif not msg_id:
+        elif msg_id not in seen:
+            seen.add(msg_id)
             result.append(email)
 
     return result
@@ -447,12 +554,16 @@ def prepare_llm_batch(
     Returns:
         List of (prompt, context) tuples ready for parallel_llm_query
     """
-    if context_fields is None:
-        context_fields = ['snippet', 'subject']
+    context_fields = ('snippet', 'subject') if context_fields is None else tuple(context_fields)
 
+    # Compact JSON: valid, smaller than repr() and fewer tokens per chunk
     prompts = []
     for chunk in chunks:
-        context = str([{f: e.get(f, '') for f in context_fields} for e in chunk])
+        context = json.dumps(
+            [{f: e.get(f, '') for f in context_fields} for e in chunk],
+            separators=(',', ':'),
+            ensure_ascii=False
+        )
         prompts.append((prompt_template, context))
 
     return prompts
@@ -469,6 +580,47 @@ def prepare_llm_batch(
 # The workflow functions below are factory functions that create closures
 # with the required dependencies.
 
+# Emails classified per LLM call in inbox_triage
+TRIAGE_BATCH_SIZE = 10
+
+# inbox_triage categories, and substrings that map free-form answers onto
+# them (checked in order)
+_TRIAGE_CATEGORIES = ("urgent", "action_required", "fyi", "newsletter")
+_TRIAGE_ALIASES = (
+    ("urgent", "urgent"),
+    ("action", "action_required"),
+    ("news", "newsletter"),
+)
+
+
+def _numbered_summaries(emails: list[dict]) -> str:
+    """Number and summarize every email in a chunk, without a size cutoff."""
+    return '\n\n'.join(
+        f"[{i}] {extract_email_summary(email)}" for i, email in enumerate(emails, 1)
+    )
+
+
+def _parse_category_list(result: str, expected: int) -> Optional[list[str]]:
+    """
+    Parse a JSON array of category names from an LLM response.
+
+    Returns None unless the response holds exactly one string per email.
+    """
+    start = result.find('[')
+    end = result.rfind(']')
+    if start < 0 or end < start:
+        return None
+    try:
+        parsed = json.loads(result[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(parsed, list) or len(parsed) != expected:
+        return None
+    if not all(isinstance(c, str) for c in parsed):
+        return None
+    return parsed
+
+
 def create_inbox_triage(llm_query_fn: Callable, parallel_map_fn: Callable):
     """
     Create inbox_triage function with injected dependencies.
@@ -499,32 +651,50 @@ def create_inbox_triage(llm_query_fn: Callable, parallel_map_fn: Callable):
         if not emails:
             return {"urgent": [], "action_required": [], "fyi": [], "newsletter": []}
 
-        # Process each email individually for classification
-        results = parallel_map_fn(
-            func_prompt="Classify this email into exactly one category: urgent, action_required, fyi, or newsletter. Respond with ONLY the category name, nothing else.",
-            chunks=[[e] for e in emails],
-            context_fn=lambda chunk: extract_email_summary(chunk[0])
+        # Classify TRIAGE_BATCH_SIZE emails per LLM call
+        chunks = chunk_by_size(emails, TRIAGE_BATCH_SIZE)
+        batch_results = parallel_map_fn(
+            func_prompt="Classify each of the numbered emails into exactly one category: urgent, action_required, fyi, or newsletter. Respond with ONLY a JSON array of category names, one per email, in the same order as the emails.",
+            chunks=chunks,
+            context_fn=_numbered_summaries,
+            json_output=True
         )
 
-        # Group by classification
-        categories = defaultdict(list)
-        valid_categories = {"urgent", "action_required", "fyi", "newsletter"}
+        results = []
+        retry = []
+        for chunk, batch_result in zip(chunks, batch_results):
+            parsed = _parse_category_list(batch_result, len(chunk))
+            if parsed is None:
+                # Unusable batch answer: classify these emails one at a time
+                retry.extend(range(len(results), len(results) + len(chunk)))
+                parsed = [''] * len(chunk)
+            results.extend(parsed)
+
+        if retry:
+            single_results = parallel_map_fn(
+                func_prompt="Classify this email into exactly one category: urgent, action_required, fyi, or newsletter. Respond with ONLY the category name, nothing else.",
+                chunks=[[emails[i]] for i in retry],
+                context_fn=lambda chunk: extract_email_summary(chunk[0])
+            )
+            for i, category in zip(retry, single_results):
+                results[i] = category
+
+        # Group by classification: exact names dispatch straight to their
+        # bucket; anything else is normalized by substring, then to fyi
+        buckets = {category: [] for category in _TRIAGE_CATEGORIES}
+        fallback = buckets["fyi"]
 
         for email, category in zip(emails, results):
             cat = category.strip().lower().replace(" ", "_")
-            # Normalize common variations
-            if cat in valid_categories:
-                categories[cat].append(email)
-            elif "urgent" in cat:
-                categories["urgent"].append(email)
-            elif "action" in cat:
-                categories["action_required"].append(email)
-            elif "newsletter" in cat or "news" in cat:
-                categories["newsletter"].append(email)
-            else:
-                categories["fyi"].append(email)
-
-        return dict(categories)
+            bucket = buckets.get(cat)
+            if bucket is None:
+                bucket = next(
+                    (buckets[name] for hint, name in _TRIAGE_ALIASES if hint in cat),
+                    fallback
+                )
+            bucket.append(email)
+
+        return {category: msgs for category, msgs in buckets.items() if msgs}
 
     return inbox_triage
 
@@ -560,16 +730,19 @@ def create_weekly_summary(llm_query_fn: Callable, parallel_map_fn: Callable):
         if not emails:
             return "No emails to summarize."
 
-        # Group by day
-        by_day = chunk_by_date(emails, period='day')
-
-        if not by_day:
-            return "No emails with valid dates to summarize."
+        # Group by day in date order: one stable sort of (day, email) pairs
+        # split into runs, without building an intermediate by-day dict
+        keyed = sorted(
+            ((_parse_date_to_key(email.get('date', ''), 'day'), email) for email in emails),
+            key=itemgetter(0)
+        )
+        sorted_days = []
+        day_chunks = []
+        for day, group in groupby(keyed, key=itemgetter(0)):
+            sorted_days.append(day)
+            day_chunks.append([email for _, email in group])
 
         # Summarize each day in parallel
-        sorted_days = sorted(by_day.keys())
-        day_chunks = [by_day[day] for day in sorted_days]
-
         daily_summaries = parallel_map_fn(
             func_prompt="Summarize the key points from these emails in 2-3 bullet points. Focus on important topics, decisions, and requests.",
             chunks=day_chunks,
@@ -647,7 +820,6 @@ If no action items found, respond with: []"""
                 pass  # Fall back to regular llm_query
 
         # Fallback: parse JSON from regular response
-        import json
         result = llm_query_fn(prompt, context=context, json_output=True)
         try:
             parsed = json.loads(result)
@@ -671,13 +843,19 @@ def create_sender_analysis(llm_query_fn: Callable, parallel_map_fn: Callable):
     Returns:
         sender_analysis function
     """
-    def sender_analysis(emails: list[dict], top_n: int = 5) -> dict[str, dict]:
+    def sender_analysis(
+        emails: list[dict],
+        top_n: int = 5,
+        by_sender: dict[str, list[dict]] = None
+    ) -> dict[str, dict]:
         """
         Analyze communication patterns for top senders.
 
         Args:
             emails: List of email dictionaries
             top_n: Number of top senders to analyze (default: 5)
+            by_sender: Optional chunk_by_sender(emails) result to reuse
+                       instead of regrouping the same emails
 
         Returns:
             Dict mapping sender to analysis dict with: count, summary, tone
@@ -690,9 +868,10 @@ def create_sender_analysis(llm_query_fn: Callable, parallel_map_fn: Callable):
         if not emails:
             return {}
 
-        # Get top senders
-        by_sender = chunk_by_sender(emails)
-        top_senders = sorted(by_sender.items(), key=lambda x: -len(x[1]))[:top_n]
+        # Get top senders (heap selection; no full sort of every sender)
+        if by_sender is None:
+            by_sender = chunk_by_sender(emails)
+        top_senders = heapq.nlargest(top_n, by_sender.items(), key=lambda x: len(x[1]))
 
         if not top_senders:
             return {}
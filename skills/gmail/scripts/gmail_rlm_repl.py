@@ -58,6 +58,7 @@ import sys
 import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -80,6 +81,7 @@ from gmail_common import (
 
 # Import RLM helper functions
 from gmail_rlm_helpers import (
+    iter_chunks,
     chunk_by_size,
     chunk_by_sender,
     chunk_by_sender_domain,
@@ -204,6 +206,10 @@ _default_use_rlm_framing = True
 # Global default model for sub-queries
 _default_model = "claude-sonnet-4-20250514"
 
+# Nesting depth of llm_query calls in the current thread. Worker threads start
+# at 0, so parallel sibling calls don't count against each other's depth.
+_call_depth: ContextVar[int] = ContextVar("rlm_call_depth", default=0)
+
 
 @dataclass
 class RLMSession:
@@ -219,14 +225,18 @@ class RLMSession:
     max_budget_usd: float = DEFAULT_MAX_BUDGET_USD
     max_calls: int = DEFAULT_MAX_CALLS
     budget_exceeded: bool = False
-    # Recursion depth tracking
-    current_depth: int = 0
+    # Recursion depth limit (current depth is tracked per thread)
     max_depth: int = DEFAULT_MAX_DEPTH
     # Cache stats (populated by cache module)
     cache_hits: int = 0
     cache_misses: int = 0
     cache_tokens_saved: int = 0
 
+    @property
+    def current_depth(self) -> int:
+        """Nesting depth of llm_query calls in the calling thread."""
+        return _call_depth.get()
+
     def add_usage(self, input_tokens: int, output_tokens: int) -> None:
         """Accumulate token counts from an API call."""
         self.total_input_tokens += input_tokens
@@ -312,16 +322,17 @@ def reset_session(
 
 @contextmanager
 def depth_context(session: RLMSession):
-    """Track recursion depth, raise if exceeded."""
-    if session.current_depth >= session.max_depth:
+    """Track recursion depth for the calling thread, raise if exceeded."""
+    depth = _call_depth.get()
+    if depth >= session.max_depth:
         raise RecursionDepthExceededError(
-            f"Max recursion depth {session.max_depth} exceeded at depth {session.current_depth}"
+            f"Max recursion depth {session.max_depth} exceeded at depth {depth}"
         )
-    session.current_depth += 1
+    token = _call_depth.set(depth + 1)
     try:
-        yield session.current_depth
+        yield depth + 1
     finally:
-        session.current_depth -= 1
+        _call_depth.reset(token)
 
 
 def llm_query(
@@ -1023,6 +1034,7 @@ def execute_rlm_code(
         'LowConfidenceError': LowConfidenceError,
 
         # Helper functions
+        'iter_chunks': iter_chunks,
         'chunk_by_size': chunk_by_size,
         'chunk_by_sender': chunk_by_sender,
         'chunk_by_sender_domain': chunk_by_sender_domain,
@@ -1146,6 +1158,7 @@ Security Helper Functions:
 
 Helper Functions:
   chunk_by_size(emails, n)             - Split into n-sized chunks (returns list of lists)
+  iter_chunks(emails, n)               - Lazily yield n-sized chunks (generator)
   chunk_by_sender(emails)              - Group by sender (returns dict)
   chunk_by_date(emails, period)        - Group by day/week/month (returns dict)
   filter_by_keyword(emails, kw)        - Filter by keyword (returns list)
@@ -1330,7 +1343,7 @@ Example:
         "--cache-dir",
         type=str,
         default=None,
-        help="Directory for cache files (default: system temp)"
+        help="Directory for the cache database (default: system temp)"
     )
 
     parser.add_argument(
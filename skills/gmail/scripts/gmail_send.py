@@ -28,6 +28,7 @@ Educational Note:
 
 import argparse
 import sys
+from itertools import chain
 from pathlib import Path
 
 from googleapiclient.errors import HttpError
@@ -36,7 +37,7 @@ from googleapiclient.errors import HttpError
 from gmail_common import (
     get_gmail_service,
     create_message,
-    validate_email,
+    invalid_emails,
     format_error,
     format_success,
     log_verbose,
@@ -81,21 +82,16 @@ def send_email(
     log_verbose(f"Preparing to send email to: {', '.join(to)}", verbose)
 
     # Validate all email addresses
-    all_emails = to + (cc or []) + (bcc or [])
-    for email in all_emails:
-        if not validate_email(email):
-            raise ValueError(f"Invalid email address: {email}")
+    # Chained lazily; stops at the first invalid address without copying lists
+    invalid = next(invalid_emails(chain(to, cc or (), bcc or ())), None)
+    if invalid is not None:
+        raise ValueError(f"Invalid email address: {invalid}")
 
     log_verbose("All email addresses validated", verbose)
 
-    # Validate attachments exist
-    if attachments:
-        for filepath in attachments:
-            if not Path(filepath).exists():
-                raise FileNotFoundError(f"Attachment not found: {filepath}")
-        log_verbose(f"Found {len(attachments)} attachment(s)", verbose)
-
     # Create RFC822 MIME message
+    # create_message stats each attachment once and raises FileNotFoundError
+    # for a missing file, so attachments are not checked separately here
     log_verbose("Creating MIME message...", verbose)
 
     raw_message = create_message(
@@ -107,6 +103,8 @@ def send_email(
         attachments=attachments
     )
 
+    if attachments:
+        log_verbose(f"Attached {len(attachments)} file(s)", verbose)
     log_verbose("MIME message created successfully", verbose)
 
     # Get authenticated Gmail service
@@ -0,0 +1,7 @@
+"""Shared pytest setup: make the skill scripts importable by module name."""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "skills" / "gmail" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
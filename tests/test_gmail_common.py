@@ -0,0 +1,52 @@
+"""Tests for address validation and status output in gmail_common."""
+
+import contextlib
+import io
+
+import pytest
+
+from gmail_common import invalid_emails, log_verbose, status_done, validate_email
+
+
+@pytest.mark.parametrize("address", [
+    "user@example.com",
+    "first.last+tag@mail.example.co.uk",
+    "Jane Doe <jane@example.com>",
+    '"Doe, Jane" <jane@example.com>',
+    "<jane@example.com>",
+])
+def test_valid_addresses(address):
+    assert validate_email(address)
+
+
+@pytest.mark.parametrize("address", [
+    "",
+    "user",
+    "user@localhost",
+    "@example.com",
+    "Jane Doe <jane@localhost>",
+    "Jane Doe",
+    "a@b.com, c@d.com",
+    "Jane <a@b.com>, John <c@d.com>",
+    "Name <a@b.com> junk",
+    "a@b.com>",
+    "<a@b.com",
+])
+def test_invalid_addresses(address):
+    assert not validate_email(address)
+
+
+def test_invalid_emails_matches_validate_email():
+    addresses = ["a@b.com", "Name <c@d.org>", "broken", "Name <e@f>", "a@b.com, c@d.com"]
+    assert list(invalid_emails(addresses)) == ["broken", "Name <e@f>", "a@b.com, c@d.com"]
+
+
+def test_status_output_follows_redirected_stderr():
+    buffer = io.StringIO()
+    with contextlib.redirect_stderr(buffer):
+        log_verbose("first", verbose=True)
+        log_verbose("second", verbose=True)
+        assert buffer.getvalue() == ""
+        status_done("hello")
+
+    assert buffer.getvalue() == "[VERBOSE] first\n[VERBOSE] second\n✓ hello\n"
@@ -0,0 +1,144 @@
+"""Tests for label apply/remove error reporting in gmail_labels."""
+
+import json
+import sys
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import gmail_labels
+
+
+def _http_error(status: int, reason: str) -> HttpError:
+    resp = httplib2.Response({"status": status})
+    resp.reason = reason
+    content = json.dumps({"error": {"code": status, "message": reason}}).encode()
+    return HttpError(resp, content)
+
+
+class FakeService:
+    """Minimal Gmail service whose batchModify outcome is decided per call."""
+
+    def __init__(self, fail, labels=None):
+        self.fail = fail
+        self.labels_list = labels or [{"name": "Work", "id": "Label_1"}]
+        self.calls = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def labels(self):
+        return self
+
+    def list(self, userId):
+        return _Request(lambda: {"labels": self.labels_list})
+
+    def batchModify(self, userId, body):
+        self.calls.append(body)
+
+        def run():
+            error = self.fail(body)
+            if error:
+                raise error
+            return {}
+
+        return _Request(run)
+
+
+class _Request:
+    def __init__(self, run):
+        self.run = run
+
+    def execute(self, **kwargs):
+        return self.run()
+
+
+@pytest.fixture
+def done_messages():
+    """Messages passed to status_done, i.e. the ✓ lines the CLI printed."""
+    return []
+
+
+@pytest.fixture
+def patch_service(monkeypatch, done_messages):
+    def install(service, label_map=None):
+        monkeypatch.setattr(gmail_labels, "get_gmail_service", lambda scopes: service)
+        monkeypatch.setattr(gmail_labels, "get_thread_http", lambda scopes: None)
+        monkeypatch.setattr(gmail_labels, "load_label_map", lambda: dict(label_map or {}))
+        monkeypatch.setattr(gmail_labels, "save_label_map", lambda m: None)
+        monkeypatch.setattr(gmail_labels, "status_done", done_messages.append)
+        return service
+
+    return install
+
+
+def _run_main(monkeypatch, *argv) -> int:
+    monkeypatch.setattr(sys, "argv", ["gmail_labels.py", *argv])
+    with pytest.raises(SystemExit) as exc:
+        gmail_labels.main()
+    return exc.value.code
+
+
+def test_apply_exits_nonzero_when_single_chunk_fails(monkeypatch, patch_service, done_messages, capsys):
+    patch_service(FakeService(lambda body: _http_error(403, "Forbidden")))
+
+    code = _run_main(monkeypatch, "--action", "apply", "--label-name", "Work", "--message-ids", "a,b")
+
+    captured = capsys.readouterr()
+    assert code != 0
+    assert done_messages == []
+    assert json.loads(captured.err[captured.err.index("{"):])["status"] == "error"
+
+
+def test_remove_reports_partial_and_exits_nonzero(monkeypatch, patch_service, done_messages, capsys):
+    ids = [f"m{i}" for i in range(gmail_labels.BATCH_MODIFY_LIMIT + 5)]
+    patch_service(FakeService(
+        lambda body: _http_error(500, "Backend Error") if body["ids"][0] == "m0" else None
+    ))
+
+    code = _run_main(monkeypatch, "--action", "remove", "--label-name", "Work", "--message-ids", ",".join(ids))
+
+    captured = capsys.readouterr()
+    result = json.loads(captured.out)
+    assert code != 0
+    assert result["status"] == "partial"
+    assert result["affected_messages"] == 5
+    assert done_messages == []
+
+
+def test_apply_exits_nonzero_when_every_parallel_chunk_fails(monkeypatch, patch_service, done_messages, capsys):
+    ids = [f"m{i}" for i in range(gmail_labels.BATCH_MODIFY_LIMIT * 3)]
+    service = patch_service(FakeService(lambda body: _http_error(403, "Forbidden")))
+
+    code = _run_main(monkeypatch, "--action", "apply", "--label-name", "Work", "--message-ids", ",".join(ids))
+
+    captured = capsys.readouterr()
+    assert len(service.calls) == 3
+    assert code != 0
+    assert captured.out == ""
+    assert done_messages == []
+
+
+def test_stale_cached_label_rejected_with_400_is_refreshed_and_retried(monkeypatch, patch_service, done_messages, capsys):
+    service = patch_service(
+        FakeService(
+            lambda body: _http_error(400, "Invalid label: Label_old")
+            if body["addLabelIds"] == ["Label_old"] else None,
+            labels=[{"name": "Work", "id": "Label_new"}],
+        ),
+        label_map={"Work": "Label_old"},
+    )
+
+    code = _run_main(monkeypatch, "--action", "apply", "--label-name", "Work", "--message-ids", "a,b")
+
+    result = json.loads(capsys.readouterr().out)
+    assert code == 0
+    assert result["status"] == "success"
+    assert result["label_id"] == "Label_new"
+    assert result["affected_messages"] == 2
+    assert [call["addLabelIds"] for call in service.calls] == [["Label_old"], ["Label_new"]]
+    assert done_messages == ["Label applied"]
@@ -0,0 +1,131 @@
+"""Tests for batched message fetching in gmail_read."""
+
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import gmail_read
+
+
+def _http_error(status: int) -> HttpError:
+    resp = httplib2.Response({"status": status})
+    return HttpError(resp, json.dumps({"error": {"code": status}}).encode())
+
+
+class FakeBatchService:
+    """
+    Gmail service whose batch parts fail according to ``fail(msg_id, attempt)``.
+
+    ``fail_batch(batch_number)`` can fail a whole multipart request instead.
+    """
+
+    def __init__(self, fail, fail_batch=lambda batch_number: None):
+        self.fail = fail
+        self.fail_batch = fail_batch
+        self.attempts = {}
+        self.batches = 0
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId, id, format, fields):
+        return id
+
+    def new_batch_http_request(self, callback):
+        return _FakeBatch(self, callback)
+
+
+class _FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.parts = []
+
+    def add(self, msg_id, request_id):
+        self.parts.append(msg_id)
+
+    def execute(self, http=None):
+        batch_number = self.service.batches
+        self.service.batches += 1
+        error = self.service.fail_batch(batch_number)
+        if error:
+            raise error
+        for msg_id in self.parts:
+            attempt = self.service.attempts.get(msg_id, 0)
+            self.service.attempts[msg_id] = attempt + 1
+            error = self.service.fail(msg_id, attempt)
+            if error:
+                self.callback(msg_id, None, error)
+            else:
+                self.callback(msg_id, {"id": msg_id}, None)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(gmail_read.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(gmail_read, "get_thread_http", lambda scopes: None)
+
+
+def test_rate_limited_parts_are_rebatched():
+    ids = [f"m{i}" for i in range(120)]
+    service = FakeBatchService(
+        lambda msg_id, attempt: _http_error(429) if attempt < 2 and msg_id.endswith("7") else None
+    )
+
+    fetched = gmail_read._fetch_messages(service, ids, "metadata")
+
+    assert set(fetched) == set(ids)
+    assert service.attempts["m7"] == 3
+    assert service.attempts["m8"] == 1
+
+
+def test_rate_limited_batch_request_is_rebatched():
+    ids = [f"m{i}" for i in range(gmail_read.FETCH_BATCH_SIZE)]
+    service = FakeBatchService(
+        lambda msg_id, attempt: None,
+        fail_batch=lambda batch_number: _http_error(429) if batch_number == 0 else None,
+    )
+
+    fetched = gmail_read._fetch_messages(service, ids, "metadata")
+
+    assert set(fetched) == set(ids)
+    assert service.batches == 2
+
+
+def test_non_retryable_batch_request_failure_raises():
+    service = FakeBatchService(
+        lambda msg_id, attempt: None,
+        fail_batch=lambda batch_number: _http_error(403),
+    )
+
+    with pytest.raises(HttpError) as exc:
+        gmail_read._fetch_messages(service, ["m0", "m1"], "metadata")
+
+    assert exc.value.status_code == 403
+    assert service.batches == 1
+
+
+def test_non_retryable_failure_raises_without_retry():
+    service = FakeBatchService(lambda msg_id, attempt: _http_error(404) if msg_id == "m1" else None)
+
+    with pytest.raises(HttpError) as exc:
+        gmail_read._fetch_messages(service, ["m0", "m1", "m2"], "metadata")
+
+    assert exc.value.status_code == 404
+    assert service.attempts["m1"] == 1
+
+
+def test_persistent_server_errors_raise_after_retries():
+    service = FakeBatchService(lambda msg_id, attempt: _http_error(503) if msg_id == "m0" else None)
+
+    with pytest.raises(HttpError) as exc:
+        gmail_read._fetch_messages(service, ["m0", "m1"], "metadata")
+
+    assert exc.value.status_code == 503
+    assert service.attempts["m0"] == gmail_read.API_NUM_RETRIES + 1
+    assert service.attempts["m1"] == 1
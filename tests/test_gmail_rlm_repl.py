@@ -0,0 +1,66 @@
+"""Tests for llm_query recursion-depth tracking in gmail_rlm_repl."""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import gmail_rlm_repl
+
+
+class FakeAnthropic:
+    """Stands in for the Anthropic client; every call waits for its siblings."""
+
+    barrier = None
+
+    def __init__(self):
+        self.messages = self
+
+    def create(self, model, max_tokens, messages, timeout):
+        # Hold each call open until a full pool of workers is in flight
+        self.barrier.wait()
+        return SimpleNamespace(
+            usage=SimpleNamespace(input_tokens=1, output_tokens=1),
+            content=[SimpleNamespace(text=messages[0]["content"].rsplit("\n", 1)[0])],
+        )
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(gmail_rlm_repl, "Anthropic", FakeAnthropic)
+    monkeypatch.setattr(FakeAnthropic, "barrier", threading.Barrier(5, timeout=5))
+    gmail_rlm_repl.disable_cache()
+    gmail_rlm_repl.reset_session()
+
+
+def test_checkpoint_map_runs_concurrently_with_default_max_depth(fake_llm, tmp_path):
+    emails = [{"id": f"m{i}", "snippet": f"email {i}"} for i in range(10)]
+    code = f"""
+results = checkpoint_parallel_map(
+    "Summarize",
+    chunk_by_size(emails, 1),
+    checkpoint_path={str(tmp_path / "run.checkpoint")!r},
+)
+FINAL(json.dumps(results))
+"""
+
+    output = gmail_rlm_repl.execute_rlm_code(code, emails, {})
+
+    assert gmail_rlm_repl.get_session().max_depth == gmail_rlm_repl.DEFAULT_MAX_DEPTH
+    results = json.loads(output)
+    assert len(results) == 10
+    assert not any(r.startswith("[LLM Error") for r in results)
+    assert gmail_rlm_repl.get_session().call_count == 10
+
+
+def test_nested_calls_still_hit_max_depth(fake_llm):
+    session = gmail_rlm_repl.get_session()
+
+    def nest():
+        with gmail_rlm_repl.depth_context(session):
+            nest()
+
+    with pytest.raises(gmail_rlm_repl.RecursionDepthExceededError):
+        nest()
+    assert session.current_depth == 0